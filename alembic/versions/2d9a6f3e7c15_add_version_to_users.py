@@ -0,0 +1,24 @@
+"""add_version_to_users
+
+Revision ID: 2d9a6f3e7c15
+Revises: 8e5d1c7b2a40
+Create Date: 2026-10-17 13:27:08.114592
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2d9a6f3e7c15'
+down_revision = '8e5d1c7b2a40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'version')
@@ -0,0 +1,31 @@
+"""add_claims_revocations_table
+
+Revision ID: 3a8b5e2d7f91
+Revises: 9f3c7d2e5a18
+Create Date: 2026-10-17 19:24:08.915463
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a8b5e2d7f91'
+down_revision = '9f3c7d2e5a18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('claims_revocations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('revoked_at', sa.Double(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_claims_revocations_revoked_at'), 'claims_revocations', ['revoked_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_claims_revocations_revoked_at'), table_name='claims_revocations')
+    op.drop_table('claims_revocations')
@@ -0,0 +1,24 @@
+"""add_username_to_claims_revocations
+
+Revision ID: 5d2a7c9e1b64
+Revises: 3a8b5e2d7f91
+Create Date: 2026-10-17 21:02:37.640215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2a7c9e1b64'
+down_revision = '3a8b5e2d7f91'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('claims_revocations', sa.Column('username', sa.String(length=100), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('claims_revocations', 'username')
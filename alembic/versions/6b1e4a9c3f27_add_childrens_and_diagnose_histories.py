@@ -0,0 +1,54 @@
+"""add_childrens_and_diagnose_histories
+
+Revision ID: 6b1e4a9c3f27
+Revises: 2d9a6f3e7c15
+Create Date: 2026-10-17 15:41:19.536204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b1e4a9c3f27'
+down_revision = '2d9a6f3e7c15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('childrens',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('gender', sa.String(length=10), nullable=False),
+    sa.Column('dob', sa.Date(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_childrens_id'), 'childrens', ['id'], unique=False)
+    op.create_index('ix_childrens_user_id_id', 'childrens', ['user_id', 'id'], unique=False)
+    op.create_table('diagnose_histories',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('children_id', sa.Integer(), nullable=False),
+    sa.Column('age_on_month', sa.Integer(), nullable=False),
+    sa.Column('gender', sa.String(length=10), nullable=False),
+    sa.Column('height', sa.Float(), nullable=False),
+    sa.Column('result', sa.String(length=50), nullable=False),
+    sa.Column('diagnosed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['children_id'], ['childrens.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_diagnose_histories_id'), 'diagnose_histories', ['id'], unique=False)
+    op.create_index('ix_diagnose_histories_children_id_diagnosed_at', 'diagnose_histories', ['children_id', 'diagnosed_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_diagnose_histories_children_id_diagnosed_at', table_name='diagnose_histories')
+    op.drop_index(op.f('ix_diagnose_histories_id'), table_name='diagnose_histories')
+    op.drop_table('diagnose_histories')
+    op.drop_index('ix_childrens_user_id_id', table_name='childrens')
+    op.drop_index(op.f('ix_childrens_id'), table_name='childrens')
+    op.drop_table('childrens')
@@ -0,0 +1,24 @@
+"""add_revokes_claims_to_claims_revocations
+
+Revision ID: 7e4b1f8a2c39
+Revises: 5d2a7c9e1b64
+Create Date: 2026-10-17 21:48:12.083541
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e4b1f8a2c39'
+down_revision = '5d2a7c9e1b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('claims_revocations', sa.Column('revokes_claims', sa.Boolean(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('claims_revocations', 'revokes_claims')
@@ -0,0 +1,28 @@
+"""add_user_listing_indexes
+
+Revision ID: 8e5d1c7b2a40
+Revises: 4c2f8e1a9d3b
+Create Date: 2026-10-17 11:04:52.781630
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e5d1c7b2a40'
+down_revision = '4c2f8e1a9d3b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_users_registration_date_id', 'users', ['registration_date', 'id'], unique=False)
+    op.create_index('ix_users_is_admin_id', 'users', ['is_admin', 'id'], unique=False)
+    op.create_index('ix_users_gender_id', 'users', ['gender', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_gender_id', table_name='users')
+    op.drop_index('ix_users_is_admin_id', table_name='users')
+    op.drop_index('ix_users_registration_date_id', table_name='users')
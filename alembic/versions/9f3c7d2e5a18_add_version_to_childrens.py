@@ -0,0 +1,24 @@
+"""add_version_to_childrens
+
+Revision ID: 9f3c7d2e5a18
+Revises: 6b1e4a9c3f27
+Create Date: 2026-10-17 18:05:42.318270
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9f3c7d2e5a18'
+down_revision = '6b1e4a9c3f27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('childrens', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('childrens', 'version')
@@ -0,0 +1,24 @@
+"""add_batch_token_to_diagnose_histories
+
+Revision ID: c4e9a2f6d813
+Revises: 7e4b1f8a2c39
+Create Date: 2026-10-17 22:31:55.207914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e9a2f6d813'
+down_revision = '7e4b1f8a2c39'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('diagnose_histories', sa.Column('batch_token', sa.String(length=32), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('diagnose_histories', 'batch_token')
@@ -0,0 +1,46 @@
+"""
+API endpoints untuk runtime metrics (Admin only)
+"""
+
+from fastapi import APIRouter, Depends
+from app.auth import Identity, principal_cache, token_cache
+from app.database import pool_metrics
+from app.db_routing import replica_router
+from app.hashing import hashing_service
+from app.middleware import get_admin_user
+from app.predictor import prediction_batcher
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/hashing")
+def get_hashing_stats(current_user: Identity = Depends(get_admin_user)):
+    """Password hashing pool queue depth and latency (Admin only)"""
+    return hashing_service.stats()
+
+
+@router.get("/cache")
+def get_cache_stats(current_user: Identity = Depends(get_admin_user)):
+    """In-process auth cache sizes and hit/miss counters (Admin only)"""
+    return {
+        "token": token_cache.stats(),
+        "principal": principal_cache.stats(),
+    }
+
+
+@router.get("/db/pool")
+def get_db_pool_stats(current_user: Identity = Depends(get_admin_user)):
+    """Database connection pool usage, checkout wait times and churn (Admin only)"""
+    return pool_metrics.stats()
+
+
+@router.get("/db/replicas")
+def get_db_replica_stats(current_user: Identity = Depends(get_admin_user)):
+    """Read replica health and read-your-writes stickiness (Admin only)"""
+    return replica_router.stats()
+
+
+@router.get("/predictor")
+def get_predictor_batching_stats(current_user: Identity = Depends(get_admin_user)):
+    """Prediction micro-batcher batch sizes and queue wait (Admin only)"""
+    return prediction_batcher.stats()
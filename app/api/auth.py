@@ -1,17 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.auth import authenticate_user, create_access_token
-from app.crud import create_user, get_user_by_username
-from app.schemas import UserLogin, UserRegister, Token, UserResponse, LoginResponse
+from app.auth import authenticate_user, build_token_claims, create_access_token, get_password_hash_async
+from app.crud import create_refresh_token, create_user, get_user_by_username, rotate_refresh_token
+from app.schemas import (
+    UserLogin, UserRegister, Token, UserResponse, LoginResponse, RefreshRequest, RefreshResponse
+)
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 
 @router.post("/login", response_model=LoginResponse)
-def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(
+    user_credentials: UserLogin,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
     """User login endpoint"""
-    user = authenticate_user(db, user_credentials.username, user_credentials.password)
+    user = await authenticate_user(db, user_credentials.username, user_credentials.password, background_tasks)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -19,25 +26,50 @@ def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token = create_access_token(data={"sub": user.username})
+    access_token = create_access_token(data=build_token_claims(user))
+    # Serialize before the refresh token commit expires the loaded row; reading
+    # it afterwards would lazy-load it with a blocking SELECT on the event loop
+    user_response = UserResponse.model_validate(user)
+    refresh_token = await run_in_threadpool(create_refresh_token, db, user_response.id)
     return {
         "access_token": access_token, 
         "token_type": "bearer",
-        "user": user
+        "refresh_token": refresh_token,
+        "user": user_response
+    }
+
+
+@router.post("/refresh", response_model=RefreshResponse)
+def refresh(refresh_request: RefreshRequest, db: Session = Depends(get_db)):
+    """Exchange refresh token for new access token (refresh token is rotated)"""
+    rotated = rotate_refresh_token(db, refresh_request.refresh_token)
+    if not rotated:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+        )
+    
+    user, refresh_token = rotated
+    access_token = create_access_token(data=build_token_claims(user))
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": refresh_token
     }
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     """User registration endpoint"""
     # Check if username already exists
-    existing_user = get_user_by_username(db, user_data.username)
+    existing_user = await run_in_threadpool(get_user_by_username, db, user_data.username)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
     
-    # Create new user
-    user = create_user(db, user_data)
+    # Hash on the dedicated pool, then create new user
+    hashed_password = await get_password_hash_async(user_data.password)
+    user = await run_in_threadpool(create_user, db, user_data, hashed_password)
     return user
@@ -0,0 +1,272 @@
+"""
+API endpoints untuk data anak dan riwayat diagnosa (milik user yang login)
+"""
+
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional
+from app.auth import Identity, get_current_identity
+from app.crud import (
+    create_children,
+    create_diagnose,
+    create_diagnoses,
+    delete_children,
+    get_children,
+    get_diagnose,
+    get_diagnose_page,
+    get_owned_children_ids,
+    get_user_childrens,
+    update_children,
+)
+from app.db_routing import get_read_db, get_write_db
+from app.etag import collection_etag, not_modified
+from app.predictor import prediction_batcher, stunting_predictor
+from app.responses import list_response
+from app.schemas import (
+    ChildrenCreate,
+    ChildrenResponse,
+    ChildrenUpdate,
+    DiagnoseBatchItem,
+    DiagnoseBatchResponse,
+    DiagnoseRequest,
+    DiagnoseResponse,
+)
+
+router = APIRouter(prefix="/children", tags=["children"])
+
+CHILDREN_LIST_ADAPTER = TypeAdapter(List[ChildrenResponse])
+DIAGNOSE_LIST_ADAPTER = TypeAdapter(List[DiagnoseResponse])
+DEFAULT_DIAGNOSE_PAGE_SIZE = 20
+MAX_DIAGNOSE_PAGE_SIZE = 200
+# One posyandu session measures up to a few hundred children
+MAX_DIAGNOSE_BATCH_SIZE = 500
+DIAGNOSE_BATCH_ITEM_ADAPTER = TypeAdapter(DiagnoseBatchItem)
+
+
+def _children_or_404(db: Session, children_id: int, user_id: int):
+    children = get_children(db, children_id, user_id)
+    if not children:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Children not found"
+        )
+    return children
+
+
+@router.get("/predictor/status")
+def predictor_status():
+    """Status ML predictor (public)"""
+    return stunting_predictor.status()
+
+
+def _validation_message(error: ValidationError) -> str:
+    first = error.errors()[0]
+    field = ".".join(str(part) for part in first["loc"])
+    return f"{field}: {first['msg']}" if field else first["msg"]
+
+
+@router.post("/diagnose/batch", response_model=DiagnoseBatchResponse)
+def create_diagnose_batch_endpoint(
+    items: List[Dict[str, Any]] = Body(..., min_length=1, max_length=MAX_DIAGNOSE_BATCH_SIZE),
+    current_user: Identity = Depends(get_current_identity),
+    db: Session = Depends(get_write_db)
+):
+    """
+    Diagnose many measurements at once (satu sesi posyandu).
+    Item yang tidak valid atau anaknya tidak ditemukan dilaporkan per item;
+    item lainnya tetap disimpan.
+    """
+    if not stunting_predictor.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Stunting predictor is not ready"
+        )
+
+    results = [{"index": index} for index in range(len(items))]
+    valid = []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, DIAGNOSE_BATCH_ITEM_ADAPTER.validate_python(item)))
+        except ValidationError as e:
+            children_id = item.get("children_id")
+            results[index]["children_id"] = children_id if isinstance(children_id, int) else None
+            results[index]["error"] = _validation_message(e)
+
+    owned = get_owned_children_ids(db, current_user.id, [item.children_id for _, item in valid])
+    accepted = []
+    for index, item in valid:
+        results[index]["children_id"] = item.children_id
+        if item.children_id in owned:
+            accepted.append((index, item))
+        else:
+            results[index]["error"] = "Children not found"
+
+    if accepted:
+        try:
+            labels = stunting_predictor.predict_many(
+                [(item.age_on_month, item.gender, item.height) for _, item in accepted]
+            )
+        except Exception as e:
+            print(f"❌ Prediction failed: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Prediction failed"
+            )
+        stored = create_diagnoses(db, [
+            {**item.model_dump(), "result": label} for (_, item), label in zip(accepted, labels)
+        ])
+        for (index, _), diagnose in zip(accepted, stored):
+            results[index]["diagnose"] = diagnose
+
+    return {
+        "created": len(accepted),
+        "failed": len(items) - len(accepted),
+        "results": results,
+    }
+
+
+@router.post("/", response_model=ChildrenResponse, status_code=status.HTTP_201_CREATED)
+def create_children_endpoint(
+    children: ChildrenCreate,
+    current_user: Identity = Depends(get_current_identity),
+    db: Session = Depends(get_write_db)
+):
+    """Create new children"""
+    return create_children(db, current_user.id, children)
+
+
+@router.get("/", response_model=List[ChildrenResponse])
+def get_childrens_endpoint(
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    current_user: Identity = Depends(get_current_identity),
+    db: Session = Depends(get_read_db)
+):
+    """Get all children of current user"""
+    childrens = get_user_childrens(db, current_user.id)
+    etag = collection_etag("children", current_user.id, ((c.id, c.version) for c in childrens))
+    cached = not_modified(if_none_match, etag)
+    if cached:
+        return cached
+    return list_response(CHILDREN_LIST_ADAPTER, childrens, headers={"ETag": etag})
+
+
+@router.get("/{children_id}", response_model=ChildrenResponse)
+def get_children_endpoint(
+    children_id: int,
+    current_user: Identity = Depends(get_current_identity),
+    db: Session = Depends(get_read_db)
+):
+    """Get children by ID"""
+    return _children_or_404(db, children_id, current_user.id)
+
+
+@router.put("/{children_id}", response_model=ChildrenResponse)
+def update_children_endpoint(
+    children_id: int,
+    children_update: ChildrenUpdate,
+    current_user: Identity = Depends(get_current_identity),
+    db: Session = Depends(get_write_db)
+):
+    """Update children"""
+    children = update_children(db, children_id, current_user.id, children_update)
+    if not children:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Children not found"
+        )
+    return children
+
+
+@router.delete("/{children_id}")
+def delete_children_endpoint(
+    children_id: int,
+    current_user: Identity = Depends(get_current_identity),
+    db: Session = Depends(get_write_db)
+):
+    """Delete children together with its diagnose histories"""
+    if not delete_children(db, children_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Children not found"
+        )
+    return {"message": "Children deleted successfully"}
+
+
+@router.post("/{children_id}/diagnose", response_model=DiagnoseResponse, status_code=status.HTTP_201_CREATED)
+async def create_diagnose_endpoint(
+    children_id: int,
+    diagnose: DiagnoseRequest,
+    current_user: Identity = Depends(get_current_identity),
+    db: Session = Depends(get_write_db)
+):
+    """
+    Diagnose stunting of children with the ML predictor and store the result.
+    Prediksi request yang bersamaan digabung oleh micro-batcher.
+    """
+    if not stunting_predictor.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Stunting predictor is not ready"
+        )
+    await run_in_threadpool(_children_or_404, db, children_id, current_user.id)
+    try:
+        result = await prediction_batcher.predict(diagnose.age_on_month, diagnose.gender, diagnose.height)
+    except Exception as e:
+        print(f"❌ Prediction failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Prediction failed"
+        )
+    return await run_in_threadpool(create_diagnose, db, children_id, diagnose, result)
+
+
+@router.get("/{children_id}/diagnose", response_model=List[DiagnoseResponse])
+def get_diagnose_list_endpoint(
+    children_id: int,
+    limit: int = Query(DEFAULT_DIAGNOSE_PAGE_SIZE, ge=1, le=MAX_DIAGNOSE_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    current_user: Identity = Depends(get_current_identity),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Get diagnose histories of children, newest first.
+    Cursor halaman berikutnya dikirim di header X-Next-Cursor.
+    """
+    _children_or_404(db, children_id, current_user.id)
+    try:
+        diagnoses, next_cursor = get_diagnose_page(db, children_id, limit, cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    # Histories are append-only, so their ids identify the page content
+    etag = collection_etag("diagnose", children_id, [cursor] + [d.id for d in diagnoses])
+    cached = not_modified(if_none_match, etag)
+    if cached:
+        return cached
+    headers = {"ETag": etag}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return list_response(DIAGNOSE_LIST_ADAPTER, diagnoses, headers=headers)
+
+
+@router.get("/{children_id}/diagnose/{diagnose_id}", response_model=DiagnoseResponse)
+def get_diagnose_endpoint(
+    children_id: int,
+    diagnose_id: int,
+    current_user: Identity = Depends(get_current_identity),
+    db: Session = Depends(get_read_db)
+):
+    """Get diagnose history by ID"""
+    _children_or_404(db, children_id, current_user.id)
+    diagnose = get_diagnose(db, children_id, diagnose_id)
+    if not diagnose:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Diagnose not found"
+        )
+    return diagnose
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.auth import get_current_user
-from app.crud import update_user, update_user_password
-from app.models import User
+from typing import Optional
+from app.db_routing import get_write_db
+from app.auth import Identity, Principal, get_current_identity, get_current_user, get_password_hash_async
+from app.crud import VersionConflict, update_user, update_user_password
+from app.etag import expected_version, not_modified, version_conflict, versioned_etag
 from app.schemas import UserUpdate, UserResponse, PasswordChange
 
 router = APIRouter(prefix="/profile", tags=["profile"])
@@ -11,36 +13,57 @@ router = APIRouter(prefix="/profile", tags=["profile"])
 
 @router.get("/", response_model=UserResponse)
 def get_current_profile(
-    current_user: User = Depends(get_current_user)
+    response: Response,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Get current user profile information"""
+    """
+    Get current user profile information.
+    Dengan If-None-Match yang cocok dijawab 304 dari principal cache, tanpa query DB.
+    """
+    etag = versioned_etag("user", current_user.id, current_user.version)
+    cached = not_modified(if_none_match, etag)
+    if cached:
+        return cached
+    response.headers["ETag"] = etag
     return current_user
 
 
 @router.put("/", response_model=UserResponse)
 def update_profile(
     user_update: UserUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    if_match: Optional[str] = Header(None, alias="If-Match"),
+    current_user: Identity = Depends(get_current_identity),
+    db: Session = Depends(get_write_db)
 ):
-    """Update user profile"""
-    updated_user = update_user(db, current_user.id, user_update)
+    """Update user profile (kirim ETag terakhir di If-Match untuk mencegah lost update)"""
+    try:
+        updated_user = update_user(
+            db, current_user.id, user_update, expected_version(if_match, "user", current_user.id)
+        )
+    except VersionConflict as e:
+        raise version_conflict("user", current_user.id, e.current_version)
     if not updated_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    response.headers["ETag"] = versioned_etag("user", updated_user.id, updated_user.version)
     return updated_user
 
 
 @router.put("/change-password")
-def change_password(
+async def change_password(
     password_change: PasswordChange,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Identity = Depends(get_current_identity),
+    db: Session = Depends(get_write_db)
 ):
     """Change user password"""
-    updated_user = update_user_password(db, current_user.id, password_change.new_password)
+    hashed_password = await get_password_hash_async(password_change.new_password)
+    updated_user = await run_in_threadpool(
+        update_user_password, db, current_user.id, password_change.new_password, hashed_password
+    )
     if not updated_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
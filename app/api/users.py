@@ -2,64 +2,187 @@
 API endpoints untuk user management (Admin only)
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+import io
+import json
+from datetime import date, datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
-from app.models import User
+from typing import Iterator, List, Literal, Optional
+from app.db_routing import get_read_db, get_write_db, open_read_session, read_primary_requested
 from app.schemas import UserResponse, UserUpdate
+from app.auth import Identity
+from app.etag import expected_version, not_modified, version_conflict, versioned_etag
 from app.middleware import get_admin_user
-from app.crud import get_user_by_id, get_all_users, update_user, delete_user
+from app.responses import list_response
+from app.crud import (
+    USER_EXPORT_COLUMNS,
+    VersionConflict,
+    delete_user,
+    get_user_by_id,
+    get_user_version,
+    get_users_page,
+    iter_user_export_batches,
+    update_user,
+)
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+USER_LIST_ADAPTER = TypeAdapter(List[UserResponse])
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FIELDS = [column.key for column in USER_EXPORT_COLUMNS]
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _export_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _stream_users_export(export_format: str, user_id: int, sticky: bool = False) -> Iterator[str]:
+    """
+    Export body, one chunk per batch. Opens its own session because the
+    generator keeps running after the endpoint function has returned.
+    """
+    db = open_read_session(user_id, sticky=sticky)
+    try:
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_FIELDS)
+            for batch in iter_user_export_batches(db, EXPORT_BATCH_SIZE):
+                writer.writerows([_export_value(value) for value in row] for row in batch)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                # Empty table: only the header was written
+                yield buffer.getvalue()
+        else:
+            for batch in iter_user_export_batches(db, EXPORT_BATCH_SIZE):
+                yield "".join(
+                    json.dumps({
+                        field: _export_value(value) for field, value in zip(EXPORT_FIELDS, row)
+                    }) + "\n"
+                    for row in batch
+                )
+    finally:
+        db.close()
+
 @router.get("/", response_model=List[UserResponse])
 def get_all_users_endpoint(
-    current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: Literal["id", "registration_date"] = "id",
+    order: Literal["asc", "desc"] = "asc",
+    is_admin: Optional[bool] = None,
+    gender: Optional[str] = None,
+    registered_from: Optional[datetime] = None,
+    registered_to: Optional[datetime] = None,
+    current_user: Identity = Depends(get_admin_user),
+    db: Session = Depends(get_read_db)
 ):
-    """Get all users (Admin only)"""
-    users = get_all_users(db)
-    return users
+    """
+    Get users page by page (Admin only).
+    Cursor halaman berikutnya dikirim di header X-Next-Cursor (tidak ada di halaman terakhir).
+    """
+    try:
+        users, next_cursor = get_users_page(
+            db,
+            limit,
+            cursor=cursor,
+            sort=sort,
+            order=order,
+            is_admin=is_admin,
+            gender=gender,
+            registered_from=registered_from,
+            registered_to=registered_to,
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    # Serialized in pydantic-core directly; response_model only documents the schema
+    return list_response(
+        USER_LIST_ADAPTER,
+        users,
+        headers={"X-Next-Cursor": next_cursor} if next_cursor else None,
+    )
+
+@router.get("/export")
+def export_users_endpoint(
+    request: Request,
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    current_user: Identity = Depends(get_admin_user)
+):
+    """Export all users as NDJSON or CSV, streamed (Admin only, tanpa kolom password)"""
+    filename = f"users-{datetime.utcnow():%Y%m%d}.{export_format}"
+    return StreamingResponse(
+        _stream_users_export(export_format, current_user.id, read_primary_requested(request, current_user.id)),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 @router.get("/{user_id}", response_model=UserResponse)
 def get_user_by_id_endpoint(
     user_id: int,
-    current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    current_user: Identity = Depends(get_admin_user),
+    db: Session = Depends(get_read_db)
 ):
-    """Get user by ID (Admin only)"""
+    """Get user by ID (Admin only). If-None-Match: cek versi saja, 304 tanpa memuat user"""
+    if if_none_match:
+        version = get_user_version(db, user_id)
+        if version is not None:
+            cached = not_modified(if_none_match, versioned_etag("user", user_id, version))
+            if cached:
+                return cached
     user = get_user_by_id(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    response.headers["ETag"] = versioned_etag("user", user.id, user.version)
     return user
 
 @router.put("/{user_id}", response_model=UserResponse)
 def update_user_endpoint(
     user_id: int,
     user_update: UserUpdate,
-    current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    if_match: Optional[str] = Header(None, alias="If-Match"),
+    current_user: Identity = Depends(get_admin_user),
+    db: Session = Depends(get_write_db)
 ):
     """Update user by ID (Admin only)"""
-    user = get_user_by_id(db, user_id)
-    if not user:
+    try:
+        updated_user = update_user(db, user_id, user_update, expected_version(if_match, "user", user_id))
+    except VersionConflict as e:
+        raise version_conflict("user", user_id, e.current_version)
+    if not updated_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    
-    updated_user = update_user(db, user_id, user_update)
+    response.headers["ETag"] = versioned_etag("user", updated_user.id, updated_user.version)
     return updated_user
 
 @router.delete("/{user_id}")
 def delete_user_endpoint(
     user_id: int,
-    current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    current_user: Identity = Depends(get_admin_user),
+    db: Session = Depends(get_write_db)
 ):
     """Delete user by ID (Admin only)"""
     user = get_user_by_id(db, user_id)
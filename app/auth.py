@@ -1,19 +1,143 @@
-from datetime import datetime, timedelta
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
 from typing import Optional
 import hashlib
+import hmac
+import secrets
+import time
 import bcrypt
 from jose import JWTError, jwt
-from fastapi import Depends, HTTPException, status, Header
+from fastapi import BackgroundTasks, Depends, HTTPException, status, Header
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from app.cache import LRUCache
 from app.config import settings
-from app.database import get_db
+from app.database import SessionLocal, get_db
+from app.hashing import hashing_service
 from app.models import User
 from app.schemas import TokenData
 
 # JWT token scheme - using custom header instead of Bearer
 
-# Bcrypt configuration
+# Bcrypt configuration (replaced by calibrate_bcrypt_rounds() at startup)
 BCRYPT_ROUNDS = 12
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 16
+# Cost timed during calibration; kept low so calibration adds little to startup
+BCRYPT_CALIBRATION_ROUNDS = 8
+
+# Verified tokens keyed by SHA256 of the raw token; entries never outlive "exp"
+token_cache = LRUCache(max_size=settings.TOKEN_CACHE_SIZE)
+
+
+@dataclass(frozen=True)
+class Identity:
+    """Who is calling: enough to authorize admin and ownership checks"""
+    id: int
+    username: str
+    is_admin: Optional[bool]
+
+
+@dataclass(frozen=True)
+class Principal(Identity):
+    """
+    Immutable snapshot of the authenticated user.
+    Carries everything UserResponse needs, but never the password hash.
+    """
+    name: str
+    avatar_type: int
+    address: Optional[str]
+    dob: date
+    gender: str
+    registration_date: Optional[datetime]
+    version: int
+
+
+_PRINCIPAL_COLUMNS = (
+    User.id,
+    User.username,
+    User.name,
+    User.avatar_type,
+    User.address,
+    User.dob,
+    User.gender,
+    User.is_admin,
+    User.registration_date,
+    User.version,
+)
+
+# Principals keyed by username; invalidated by every user write in app.crud,
+# at once in the writing process and within CLAIMS_REVOCATION_POLL_SECONDS in
+# every other worker (through the claims_revocations table). The TTL is a
+# backstop for writes that bypass app.crud.
+principal_cache = LRUCache(
+    max_size=settings.PRINCIPAL_CACHE_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+# User IDs whose signed claims must no longer be trusted, mapped to the time of
+# revocation. Tokens issued before that are re-checked against the database.
+# Entries only need to outlive the access tokens issued before them.
+# This is the worker's view of the claims_revocations table (app.crud
+# persists revocations, app.main polls the table every
+# CLAIMS_REVOCATION_POLL_SECONDS); revocations made by this process apply at once.
+claims_revocations = LRUCache(
+    max_size=settings.PRINCIPAL_CACHE_SIZE,
+    ttl_seconds=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
+
+def revoke_claims(user_id: int, revoked_at: Optional[float] = None) -> float:
+    """Stop trusting token claims issued to this user so far (e.g. after demotion)"""
+    if revoked_at is None:
+        revoked_at = time.time()
+    known = claims_revocations.get(user_id)
+    if known is None or known < revoked_at:
+        claims_revocations.set(user_id, revoked_at)
+    return revoked_at
+
+
+# claims_revocations row ids already merged by this worker
+_applied_revocations = LRUCache(
+    max_size=settings.PRINCIPAL_CACHE_SIZE,
+    ttl_seconds=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
+
+def apply_claims_revocations(rows) -> None:
+    """
+    Merge claims_revocations rows (id, user_id, username, revoked_at,
+    revokes_claims) loaded from the database. The cached principal is
+    evicted once per row; a revoked token falls back to it, so it must not
+    outlive the revocation.
+    """
+    for row_id, user_id, username, revoked_at, revokes_claims in rows:
+        if revokes_claims:
+            revoke_claims(user_id, revoked_at)
+        if _applied_revocations.get(row_id) is None:
+            invalidate_principal(username)
+            _applied_revocations.set(row_id, True)
+
+
+def invalidate_principal(username: Optional[str]) -> None:
+    """Drop cached principal after the user row changed"""
+    if username:
+        principal_cache.invalidate(username)
+
+
+def get_principal(db: Session, username: str) -> Optional[Principal]:
+    """Get principal from cache, loading only the non-secret columns on a miss"""
+    principal = principal_cache.get(username)
+    if principal is not None:
+        return principal
+    
+    row = db.query(*_PRINCIPAL_COLUMNS).filter(User.username == username).first()
+    if row is None:
+        return None
+    principal = Principal(**row._asdict())
+    principal_cache.set(username, principal)
+    return principal
 
 
 def _pre_hash_password(password: str) -> bytes:
@@ -64,6 +188,85 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
+def calibrate_bcrypt_rounds(target_ms: int, samples: int = 3) -> int:
+    """
+    Pick the bcrypt cost whose hashing time on this machine is closest to
+    target_ms. Each extra round doubles the work, so timing one cheap cost
+    is enough to extrapolate the rest.
+    """
+    global BCRYPT_ROUNDS
+    
+    pre_hashed = _pre_hash_password("calibration")
+    salt = bcrypt.gensalt(rounds=BCRYPT_CALIBRATION_ROUNDS)
+    # Best of several samples filters out scheduler noise
+    base_ms = float("inf")
+    for _ in range(samples):
+        started = time.perf_counter()
+        bcrypt.hashpw(pre_hashed, salt)
+        base_ms = min(base_ms, (time.perf_counter() - started) * 1000)
+    
+    rounds = BCRYPT_MIN_ROUNDS
+    while (
+        rounds < BCRYPT_MAX_ROUNDS
+        and abs(base_ms * 2 ** (rounds + 1 - BCRYPT_CALIBRATION_ROUNDS) - target_ms)
+        < abs(base_ms * 2 ** (rounds - BCRYPT_CALIBRATION_ROUNDS) - target_ms)
+    ):
+        rounds += 1
+    
+    BCRYPT_ROUNDS = rounds
+    return rounds
+
+
+def configure_bcrypt_rounds() -> int:
+    """Apply BCRYPT_ROUNDS from settings, or calibrate towards BCRYPT_TARGET_MS"""
+    global BCRYPT_ROUNDS
+    
+    if settings.BCRYPT_ROUNDS:
+        BCRYPT_ROUNDS = settings.BCRYPT_ROUNDS
+        return BCRYPT_ROUNDS
+    return calibrate_bcrypt_rounds(settings.BCRYPT_TARGET_MS)
+
+
+def get_hash_rounds(hashed_password: str) -> Optional[int]:
+    """Read the cost factor from a "$2b$12$..." bcrypt hash"""
+    try:
+        return int(hashed_password.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    True when the stored hash was made with a lower cost than the current one.
+    Never downgrades: workers calibrated to different costs would otherwise
+    rehash the same password back and forth.
+    """
+    rounds = get_hash_rounds(hashed_password)
+    return rounds is not None and rounds < BCRYPT_ROUNDS
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the dedicated hashing pool"""
+    return await hashing_service.run(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the dedicated hashing pool"""
+    return await hashing_service.run(verify_password, plain_password, hashed_password)
+
+
+def build_token_claims(user: User) -> dict:
+    """Claims for a new access token; adds signed uid/adm in stateless claims mode"""
+    claims = {"sub": user.username}
+    if settings.AUTH_STATELESS_CLAIMS:
+        claims.update({
+            "uid": user.id,
+            "adm": bool(user.is_admin),
+            "iat": int(time.time()),
+        })
+    return claims
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
     to_encode = data.copy()
@@ -77,8 +280,29 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+def generate_refresh_token() -> str:
+    """Opaque random refresh token handed to the client"""
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_token(token: str) -> str:
+    """Keyed hash stored in refresh_tokens.token_hash"""
+    return hmac.new(
+        settings.SECRET_KEY.encode('utf-8'), token.encode('utf-8'), hashlib.sha256
+    ).hexdigest()
+
+
 def verify_token(token: str) -> TokenData:
-    """Verify JWT token and return token data"""
+    """
+    Verify JWT token and return token data.
+    Successfully verified tokens are cached so repeated requests with the
+    same token skip signature verification until the token expires.
+    """
+    cache_key = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    token_data = token_cache.get(cache_key)
+    if token_data is not None:
+        return token_data
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -89,41 +313,128 @@ def verify_token(token: str) -> TokenData:
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-        token_data = TokenData(username=username)
+        token_data = TokenData(
+            username=username,
+            user_id=payload.get("uid"),
+            is_admin=payload.get("adm"),
+            issued_at=payload.get("iat"),
+        )
     except JWTError:
         raise credentials_exception
     
+    expires_at = time.time() + settings.TOKEN_CACHE_TTL_SECONDS
+    if payload.get("exp") is not None:
+        expires_at = min(expires_at, float(payload["exp"]))
+    token_cache.set(cache_key, token_data, expires_at=expires_at)
     return token_data
 
 
-def get_current_user(
-    token: str = Header(..., alias="token"),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user from token header"""
+def _claims_identity(token_data: TokenData) -> Optional[Identity]:
+    """Identity from signed claims, or None when claims must not be trusted"""
+    if not settings.AUTH_STATELESS_CLAIMS:
+        return None
+    if token_data.user_id is None or token_data.is_admin is None or token_data.issued_at is None:
+        return None
+    revoked_at = claims_revocations.get(token_data.user_id)
+    if revoked_at is not None and token_data.issued_at <= revoked_at:
+        return None
+    return Identity(
+        id=token_data.user_id,
+        username=token_data.username,
+        is_admin=token_data.is_admin,
+    )
+
+
+def _verify_token_header(token: str) -> TokenData:
     if not token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token header is required",
         )
-    
-    token_data = verify_token(token)
-    
-    user = db.query(User).filter(User.username == token_data.username).first()
+    return verify_token(token)
+
+
+def _load_principal(db: Session, token_data: TokenData) -> Principal:
+    user = get_principal(db, token_data.username)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
-    
     return user
 
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
-    """Authenticate user with username and password"""
-    user = db.query(User).filter(User.username == username).first()
+def get_current_user(
+    token: str = Header(..., alias="token"),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """Get current authenticated user from token header"""
+    token_data = _verify_token_header(token)
+    return _load_principal(db, token_data)
+
+
+def get_current_identity(
+    token: str = Header(..., alias="token"),
+    db: Session = Depends(get_db)
+) -> Identity:
+    """
+    Get caller identity for authorization checks.
+    In stateless claims mode this is answered from the token alone;
+    otherwise (or when the claims were revoked) it falls back to the
+    principal lookup.
+    """
+    token_data = _verify_token_header(token)
+    identity = _claims_identity(token_data)
+    if identity is not None:
+        return identity
+    return _load_principal(db, token_data)
+
+
+def _get_user_by_username(db: Session, username: str) -> Optional[User]:
+    return db.query(User).filter(User.username == username).first()
+
+
+def _replace_password_hash(user_id: int, old_hash: str, new_hash: str) -> None:
+    # Own session: runs after the response, when the request session is gone.
+    # Only swap the hash if nobody changed the password in the meantime
+    db = SessionLocal()
+    try:
+        db.query(User).filter(User.id == user_id, User.password == old_hash).update(
+            {User.password: new_hash}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+async def rehash_password(user_id: int, old_hash: str, password: str) -> None:
+    """Upgrade a stored hash to the current cost; best effort, run as a background task"""
+    try:
+        new_hash = await get_password_hash_async(password)
+        await run_in_threadpool(_replace_password_hash, user_id, old_hash, new_hash)
+    except HTTPException:
+        # Hashing pool is saturated; try again on a later login
+        return
+    except Exception as e:
+        print(f"⚠️  Password rehash failed for user {user_id}: {e}")
+
+
+async def authenticate_user(
+    db: Session,
+    username: str,
+    password: str,
+    background_tasks: Optional[BackgroundTasks] = None
+) -> Optional[User]:
+    """
+    Authenticate user with username and password.
+    Hashes made with a lower cost than the current one are rehashed after
+    the response has been sent (when background_tasks is given).
+    """
+    user = await run_in_threadpool(_get_user_by_username, db, username)
     if not user:
         return None
-    if not verify_password(password, user.password):
+    if not await verify_password_async(password, user.password):
         return None
+    if background_tasks is not None and password_needs_rehash(user.password):
+        background_tasks.add_task(rehash_password, user.id, user.password, password)
     return user
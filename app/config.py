@@ -10,11 +10,73 @@ class Settings:
     
     # Database settings
     DATABASE_URL: str = os.getenv("DATABASE_URL", "mysql+pymysql://root:password@db:3306/stunting_db")
+    # Async driver URL; derived from DATABASE_URL (aiomysql / aiosqlite) when empty
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")
+    
+    # Connection pool settings
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "300"))
+    # true: ping every connection on checkout; false: rely on DB_POOL_RECYCLE and
+    # invalidate connections only after a disconnect error
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Connections opened at startup so the first requests do not pay for them
+    DB_POOL_WARMUP: int = int(os.getenv("DB_POOL_WARMUP", os.getenv("DB_POOL_SIZE", "5")))
+    
+    # Read replicas (comma separated URLs) for read-only endpoints
+    DATABASE_REPLICA_URLS: list = [
+        url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+    ]
+    # After a write, the same user reads from the primary for this many seconds
+    REPLICA_STICKY_SECONDS: int = int(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+    # How often replicas are pinged; a failed replica is skipped until it answers again
+    REPLICA_HEALTH_CHECK_SECONDS: int = int(os.getenv("REPLICA_HEALTH_CHECK_SECONDS", "10"))
+    
+    # Per-request SQL instrumentation (N+1 detection, slow-query log)
+    SQL_METRICS_ENABLED: bool = os.getenv("SQL_METRICS_ENABLED", "true").lower() == "true"
+    # X-DB-Query-Count / X-DB-Time-Ms response headers reveal backend timing and
+    # query shape to any client, so they default to development only
+    SQL_METRICS_HEADERS: bool = (
+        os.getenv("SQL_METRICS_HEADERS")
+        or ("true" if os.getenv("ENVIRONMENT", "development") == "development" else "false")
+    ).lower() == "true"
+    # Same statement shape executed more often than this in one request is flagged as N+1
+    SQL_N_PLUS_ONE_THRESHOLD: int = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+    # Statements slower than this are logged (parameters redacted), sampled by rate 0.0-1.0
+    SQL_SLOW_QUERY_MS: int = int(os.getenv("SQL_SLOW_QUERY_MS", "200"))
+    SQL_SLOW_QUERY_SAMPLE_RATE: float = float(os.getenv("SQL_SLOW_QUERY_SAMPLE_RATE", "1.0"))
     
     # JWT settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+    REFRESH_TOKEN_PRUNE_INTERVAL_SECONDS: int = int(os.getenv("REFRESH_TOKEN_PRUNE_INTERVAL_SECONDS", "3600"))
+    
+    # Bcrypt cost settings: fixed BCRYPT_ROUNDS, or calibrated at startup to BCRYPT_TARGET_MS
+    BCRYPT_ROUNDS: Optional[int] = int(os.getenv("BCRYPT_ROUNDS")) if os.getenv("BCRYPT_ROUNDS") else None
+    BCRYPT_TARGET_MS: int = int(os.getenv("BCRYPT_TARGET_MS", "250"))
+    
+    # Password hashing pool settings
+    HASH_WORKERS: int = int(os.getenv("HASH_WORKERS", "2"))
+    HASH_QUEUE_SIZE: int = int(os.getenv("HASH_QUEUE_SIZE", "32"))
+    
+    # Verified token cache settings
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+    TOKEN_CACHE_TTL_SECONDS: int = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+    
+    # Authenticated principal cache settings
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+    PRINCIPAL_CACHE_TTL_SECONDS: int = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    # How often every worker reloads user changes / claims revocations made by other processes
+    CLAIMS_REVOCATION_POLL_SECONDS: int = int(os.getenv("CLAIMS_REVOCATION_POLL_SECONDS", "5"))
+    
+    # Authorize from signed "uid"/"adm" token claims instead of the users table
+    AUTH_STATELESS_CLAIMS: bool = os.getenv("AUTH_STATELESS_CLAIMS", "false").lower() == "true"
+    
+    # Default JSON response class: "orjson" (fast, needs orjson) or "json" (stdlib)
+    JSON_RESPONSE_CLASS: str = os.getenv("JSON_RESPONSE_CLASS", "orjson")
     
     # Base URL settings
     BASE_URL: str = os.getenv("BASE_URL", "http://localhost:8000")
@@ -22,6 +84,13 @@ class Settings:
     # Environment
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
     
+    # Startup settings
+    # Skip schema check and pool warm-up to get workers serving as fast as possible
+    FAST_START: bool = os.getenv("FAST_START", "false").lower() == "true"
+    # "warn": log revision mismatch, "strict": refuse to start, "off": skip the query
+    SCHEMA_CHECK: str = os.getenv("SCHEMA_CHECK", "warn")
+    STARTUP_BUDGET_MS: int = int(os.getenv("STARTUP_BUDGET_MS", "2000"))
+    
     # CORS settings
     CORS_ORIGINS: list = [
         "http://localhost:3000",
@@ -41,8 +110,18 @@ class Settings:
     REPORTS_DIR: str = "reports"
     
     # ML Model settings
-    MODEL_CACHE_DIR: str = "model_cache"
-    MODEL_FILE: str = "stunting_predictor.pkl"
+    MODEL_CACHE_DIR: str = os.getenv("MODEL_CACHE_DIR", "model_cache")
+    MODEL_FILE: str = os.getenv("MODEL_FILE", "stunting_predictor.pkl")
+    # model: pickled sklearn estimator (MODEL_FILE) | numpy: exported .npz of it, no sklearn
+    # | who: WHO height-for-age z-score
+    PREDICTOR_ENGINE: str = os.getenv("PREDICTOR_ENGINE", "model")
+    # Cached predictions; the whole input space is 61 ages x 2 genders x ~1700 heights
+    PREDICTION_CACHE_SIZE: int = int(os.getenv("PREDICTION_CACHE_SIZE", "20000"))
+    # Use MODEL_CACHE_DIR/<model>.<hash>.lut.npy when it was built for the current model file
+    PREDICTION_LOOKUP_TABLE: bool = os.getenv("PREDICTION_LOOKUP_TABLE", "true").lower() == "true"
+    # Concurrent single predictions are scored together: wait at most this long / this many
+    PREDICTION_BATCH_WINDOW_MS: float = float(os.getenv("PREDICTION_BATCH_WINDOW_MS", "2"))
+    PREDICTION_BATCH_SIZE: int = int(os.getenv("PREDICTION_BATCH_SIZE", "64"))
 
 # Create global settings instance
 settings = Settings()
\ No newline at end of file
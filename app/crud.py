@@ -1,14 +1,31 @@
+import base64
+import binascii
+import json
+import time
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import DateTime, Select, Update, and_, delete, func, insert, or_, select, update
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.models import User
-from app.schemas import UserCreate, UserUpdate
-from app.auth import get_password_hash
+from sqlalchemy.sql.functions import FunctionElement
+from typing import Iterator, List, Optional, Tuple
+from app.config import settings
+from app.models import Children, ClaimsRevocation, DiagnoseHistory, RefreshToken, User
+from app.schemas import ChildrenCreate, ChildrenUpdate, DiagnoseRequest, UserCreate, UserUpdate
+from app.auth import (
+    generate_refresh_token,
+    get_password_hash,
+    hash_refresh_token,
+    invalidate_principal,
+    revoke_claims,
+)
 
 
 # User CRUD operations
-def create_user(db: Session, user: UserCreate) -> User:
+def create_user(db: Session, user: UserCreate, hashed_password: Optional[str] = None) -> User:
     """Create new user"""
-    hashed_password = get_password_hash(user.password)
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     db_user = User(
         avatar_type=user.avatar_type,
         name=user.name,
@@ -34,44 +51,562 @@ def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
     return db.query(User).filter(User.id == user_id).first()
 
 
+def get_user_version(db: Session, user_id: int) -> Optional[int]:
+    """Current row version of user (for conditional requests)"""
+    return db.query(User.version).filter(User.id == user_id).scalar()
+
+
 def get_all_users(db: Session) -> List[User]:
     """Get all users (Admin only)"""
     return db.query(User).all()
 
 
+class keyset_datetime(FunctionElement):
+    """
+    DateTime column or value as compared by keyset pagination. Plain column
+    on real databases; on SQLite, where DateTime is text, both sides are
+    normalized with strftime, because func.now() stores "YYYY-MM-DD HH:MM:SS"
+    while bound datetimes carry ".ffffff" and would never compare equal.
+
+    The wrapped column cannot be range-scanned, so on SQLite (development)
+    pagination is not index-backed: the index only narrows the equality prefix
+    (e.g. children_id) and every matching row is sorted in a temp B-tree per
+    page. The index seek happens on MySQL / PostgreSQL only.
+    """
+
+    type = DateTime()
+    name = "keyset_datetime"
+    inherit_cache = True
+
+
+@compiles(keyset_datetime)
+def _compile_keyset_datetime(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(keyset_datetime, "sqlite")
+def _compile_keyset_datetime_sqlite(element, compiler, **kw):
+    return compiler.process(func.strftime("%Y-%m-%d %H:%M:%f", *element.clauses.clauses), **kw)
+
+
+# Keyset pagination: columns a page may be sorted by (always tie-broken by id)
+USER_SORT_COLUMNS = {
+    "id": User.id,
+    "registration_date": User.registration_date,
+}
+
+
+def encode_cursor(sort: str, order: str, row) -> str:
+    """Opaque cursor pointing just after ``row`` (anything with ``id`` and the sort attribute)"""
+    payload = {"s": sort, "o": order, "v": getattr(row, sort), "id": row.id}
+    if isinstance(payload["v"], datetime):
+        payload.update(v=payload["v"].isoformat(), t="dt")
+    encoded = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(encoded.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, order: str) -> Tuple[object, int]:
+    """(sort value, id) of a cursor; ValueError when invalid or made for another ordering"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["s"] != sort or payload["o"] != order:
+            raise ValueError("cursor was issued for a different sort order")
+        value = payload["v"]
+        if payload.get("t") == "dt":
+            value = datetime.fromisoformat(value)
+        return value, int(payload["id"])
+    except (KeyError, TypeError, json.JSONDecodeError, UnicodeDecodeError, binascii.Error) as e:
+        raise ValueError("invalid cursor") from e
+
+
+def users_page_queries(
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    order: str = "asc",
+    is_admin: Optional[bool] = None,
+    gender: Optional[str] = None,
+    registered_from: Optional[datetime] = None,
+    registered_to: Optional[datetime] = None,
+) -> List[Select]:
+    """
+    SELECTs (without LIMIT) that together continue the listing after the
+    cursor; run them in order until the page is full. Each one seeks past
+    the cursor instead of using OFFSET, so every page costs the same index
+    range scan on (sort column, id).
+
+    registration_date is nullable: users without one are listed after all
+    others (in id order) by a second query, so the ORDER BY stays on the
+    index on every database instead of relying on dialect NULL ordering.
+    """
+    descending = order == "desc"
+    query = select(User)
+
+    if is_admin is not None:
+        # "= true/false" (not "IS TRUE/FALSE") so MySQL can use ref / ref_or_null on ix_users_is_admin_id
+        if is_admin:
+            query = query.where(User.is_admin == True)  # noqa: E712
+        else:
+            query = query.where(or_(User.is_admin == False, User.is_admin.is_(None)))  # noqa: E712
+    if gender is not None:
+        query = query.where(User.gender == gender)
+    if registered_from is not None:
+        query = query.where(User.registration_date >= registered_from)
+    if registered_to is not None:
+        query = query.where(User.registration_date < registered_to)
+
+    value, last_id = decode_cursor(cursor, sort, order) if cursor else (None, None)
+    by_id = User.id.desc() if descending else User.id
+    after_id = (User.id < last_id if descending else User.id > last_id) if last_id is not None else None
+
+    if sort == "id":
+        return [(query.where(after_id) if after_id is not None else query).order_by(by_id)]
+
+    sort_column = USER_SORT_COLUMNS[sort]
+    nulls = query.where(sort_column.is_(None))
+    if last_id is not None and value is None:
+        # The cursor is already among the users without a sort value
+        return [nulls.where(after_id).order_by(by_id)]
+
+    keyed = keyset_datetime(sort_column)
+    values = query.where(sort_column.is_not(None))
+    if last_id is not None:
+        bound = keyset_datetime(value)
+        seek = keyed < bound if descending else keyed > bound
+        values = values.where(or_(seek, and_(keyed == bound, after_id)))
+    return [
+        values.order_by(keyed.desc() if descending else keyed, by_id),
+        nulls.order_by(by_id),
+    ]
+
+
+def split_page(rows: list, limit: int, sort: str, order: str) -> Tuple[list, Optional[str]]:
+    """Trim the extra row fetched by a page query and build the next cursor"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(sort, order, rows[-1])
+
+
+# Columns written by the user export; never includes the password hash
+USER_EXPORT_COLUMNS = (
+    User.id,
+    User.avatar_type,
+    User.name,
+    User.username,
+    User.address,
+    User.dob,
+    User.gender,
+    User.is_admin,
+    User.registration_date,
+)
+
+
+def iter_user_export_batches(db: Session, batch_size: int = 1000) -> Iterator[list]:
+    """
+    Yield rows of all users in batches of ``batch_size`` from a server-side
+    cursor, so memory use does not depend on the size of the table.
+    """
+    query = select(*USER_EXPORT_COLUMNS).order_by(User.id).execution_options(
+        stream_results=True, yield_per=batch_size
+    )
+    result = db.execute(query)
+    try:
+        for batch in result.partitions():
+            yield batch
+    finally:
+        result.close()
+
+
+def get_users_page(
+    db: Session,
+    limit: int,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    order: str = "asc",
+    **filters
+) -> Tuple[List[User], Optional[str]]:
+    """One page of users and the cursor of the next page (None on the last page)"""
+    users = []
+    for query in users_page_queries(cursor=cursor, sort=sort, order=order, **filters):
+        # One extra row tells whether there is a next page
+        users += db.execute(query.limit(limit + 1 - len(users))).scalars()
+        if len(users) > limit:
+            break
+    return split_page(users, limit, sort, order)
+
+
 def delete_user(db: Session, user_id: int) -> bool:
     """Delete user (Admin only)"""
     db_user = get_user_by_id(db, user_id)
     if not db_user:
         return False
     
+    username = db_user.username
     db.delete(db_user)
     db.commit()
+    invalidate_user(db, user_id, [username], revokes_claims=True)
     return True
 
 
-def update_user(db: Session, user_id: int, user_update: UserUpdate) -> Optional[User]:
-    """Update user"""
-    db_user = get_user_by_id(db, user_id)
-    if not db_user:
+def user_invalidation_rows(user_id: int, usernames: List[Optional[str]], revokes_claims: bool) -> List[dict]:
+    """
+    Evict the user's cached principals in this process (and revoke its token
+    claims when asked); returns the claims_revocations rows telling every
+    other worker to do the same.
+    """
+    revoked_at = revoke_claims(user_id) if revokes_claims else time.time()
+    usernames = list(dict.fromkeys(username for username in usernames if username)) or [None]
+    for username in usernames:
+        invalidate_principal(username)
+    return [
+        {"user_id": user_id, "username": username, "revoked_at": revoked_at, "revokes_claims": revokes_claims}
+        for username in usernames
+    ]
+
+
+def invalidate_user(
+    db: Session,
+    user_id: int,
+    usernames: List[Optional[str]],
+    revokes_claims: bool = False
+) -> None:
+    """
+    Make a committed user change visible to every process: evicts the cached
+    principals of ``usernames`` here at once and, through claims_revocations,
+    in every other worker within CLAIMS_REVOCATION_POLL_SECONDS (also for
+    set_admin.py runs). With revokes_claims, token claims issued so far stop
+    being trusted; called after the commit, so every token issued from the
+    old row has an "iat" at or before the recorded time.
+    """
+    db.execute(insert(ClaimsRevocation), user_invalidation_rows(user_id, usernames, revokes_claims))
+    db.commit()
+
+
+def get_claims_revocations(db: Session, since: Optional[float] = None) -> list:
+    """
+    claims_revocations rows recorded at or after ``since`` (default: every
+    row still younger than an access token), as
+    (id, user_id, username, revoked_at, revokes_claims)
+    """
+    oldest = time.time() - settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    return db.execute(
+        select(
+            ClaimsRevocation.id,
+            ClaimsRevocation.user_id,
+            ClaimsRevocation.username,
+            ClaimsRevocation.revoked_at,
+            ClaimsRevocation.revokes_claims,
+        )
+        .where(ClaimsRevocation.revoked_at >= max(oldest, since or oldest))
+    ).all()
+
+
+def prune_claims_revocations(db: Session) -> int:
+    """Delete revocations older than any access token they could apply to"""
+    since = time.time() - settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    deleted = db.execute(delete(ClaimsRevocation).where(ClaimsRevocation.revoked_at < since)).rowcount
+    db.commit()
+    return deleted
+
+
+class VersionConflict(Exception):
+    """The user row exists but is no longer at the version the client edited"""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"user is at version {current_version}")
+        self.current_version = current_version
+
+
+# Columns returned by update_user (everything UserResponse needs, plus the version)
+USER_RESPONSE_COLUMNS = USER_EXPORT_COLUMNS + (User.version,)
+
+
+def user_update_statement(user_id: int, update_data: dict, expected_version: Optional[int] = None) -> Update:
+    """UPDATE of the given fields that bumps the row version (and checks it when expected_version is set)"""
+    statement = (
+        update(User)
+        .where(User.id == user_id)
+        .values(**update_data, version=User.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if expected_version is not None:
+        statement = statement.where(User.version == expected_version)
+    return statement
+
+
+def update_user(
+    db: Session,
+    user_id: int,
+    user_update: UserUpdate,
+    expected_version: Optional[int] = None
+):
+    """
+    Update user with a single UPDATE ... RETURNING; dialects without UPDATE
+    RETURNING (MySQL) read the new row back in the same transaction.
+    Returns the updated row (UserResponse columns + version) or None when the
+    user does not exist. Raises VersionConflict when expected_version is stale.
+    """
+    update_data = user_update.model_dump(exclude_unset=True)
+    old_username = None
+    if "username" in update_data:
+        # Only renames need the old username, to evict its cached principal
+        old_username = db.query(User.username).filter(User.id == user_id).scalar()
+
+    if not update_data:
+        # Nothing to change: keep the version and return the current row
+        query = select(*USER_RESPONSE_COLUMNS).where(User.id == user_id)
+        if expected_version is not None:
+            query = query.where(User.version == expected_version)
+        row = db.execute(query).first()
+    elif db.get_bind().dialect.update_returning:
+        statement = user_update_statement(user_id, update_data, expected_version)
+        row = db.execute(statement.returning(*USER_RESPONSE_COLUMNS)).first()
+    else:
+        statement = user_update_statement(user_id, update_data, expected_version)
+        updated = db.execute(statement).rowcount
+        row = db.execute(select(*USER_RESPONSE_COLUMNS).where(User.id == user_id)).first() if updated else None
+
+    if row is None:
+        db.rollback()
+        if expected_version is not None:
+            current_version = db.query(User.version).filter(User.id == user_id).scalar()
+            if current_version is not None:
+                raise VersionConflict(current_version)
         return None
-    
-    update_data = user_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_user, field, value)
-    
+
     db.commit()
-    db.refresh(db_user)
-    return db_user
+    if update_data:
+        invalidate_user(db, user_id, [old_username, row.username], revokes_claims="is_admin" in update_data)
+    return row
 
 
-def update_user_password(db: Session, user_id: int, new_password: str) -> Optional[User]:
+def update_user_password(
+    db: Session,
+    user_id: int,
+    new_password: str,
+    hashed_password: Optional[str] = None
+) -> Optional[User]:
     """Update user password"""
     db_user = get_user_by_id(db, user_id)
     if not db_user:
         return None
     
-    db_user.password = get_password_hash(new_password)
+    if hashed_password is None:
+        hashed_password = get_password_hash(new_password)
+    db_user.password = hashed_password
+    # A new password logs out every device holding a refresh token
+    db.query(RefreshToken).filter(RefreshToken.user_id == user_id).delete(synchronize_session=False)
     db.commit()
     db.refresh(db_user)
+    invalidate_user(db, user_id, [db_user.username])
     return db_user
+
+
+# Refresh token operations
+def create_refresh_token(db: Session, user_id: int) -> str:
+    """Issue new refresh token for user and return the raw token"""
+    token = generate_refresh_token()
+    db.add(RefreshToken(
+        user_id=user_id,
+        token_hash=hash_refresh_token(token),
+        expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    db.commit()
+    return token
+
+
+def rotate_refresh_token(db: Session, token: str) -> Optional[Tuple[object, str]]:
+    """
+    Exchange refresh token for a new one.
+    Returns (user row with id/username/is_admin, new raw token), or None when
+    the token is unknown, expired or was already used.
+    """
+    row = (
+        db.query(
+            RefreshToken.id.label("token_id"),
+            RefreshToken.expires_at,
+            User.id,
+            User.username,
+            User.is_admin,
+        )
+        .join(User, User.id == RefreshToken.user_id)
+        .filter(RefreshToken.token_hash == hash_refresh_token(token))
+        .first()
+    )
+    if row is None:
+        return None
+    
+    # Deleting first makes every token single-use even under concurrent refreshes
+    deleted = db.query(RefreshToken).filter(RefreshToken.id == row.token_id).delete(synchronize_session=False)
+    if not deleted or row.expires_at <= datetime.utcnow():
+        db.commit()
+        return None
+    
+    new_token = generate_refresh_token()
+    db.add(RefreshToken(
+        user_id=row.id,
+        token_hash=hash_refresh_token(new_token),
+        expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    db.commit()
+    return row, new_token
+
+
+def prune_expired_refresh_tokens(db: Session) -> int:
+    """Delete expired refresh tokens, return number of removed rows"""
+    deleted = (
+        db.query(RefreshToken)
+        .filter(RefreshToken.expires_at <= datetime.utcnow())
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
+
+
+# Children CRUD operations (always scoped to the owning user)
+def create_children(db: Session, user_id: int, children: ChildrenCreate) -> Children:
+    """Create new children for user"""
+    db_children = Children(user_id=user_id, **children.model_dump())
+    db.add(db_children)
+    db.commit()
+    db.refresh(db_children)
+    return db_children
+
+
+def get_user_childrens(db: Session, user_id: int) -> List[Children]:
+    """Get all children of user (range scan on (user_id, id))"""
+    return db.query(Children).filter(Children.user_id == user_id).order_by(Children.id).all()
+
+
+def get_children(db: Session, children_id: int, user_id: int) -> Optional[Children]:
+    """Get children by ID if it belongs to user"""
+    return db.query(Children).filter(Children.id == children_id, Children.user_id == user_id).first()
+
+
+def update_children(db: Session, children_id: int, user_id: int, children_update: ChildrenUpdate) -> Optional[Children]:
+    """Update children"""
+    db_children = get_children(db, children_id, user_id)
+    if not db_children:
+        return None
+    
+    for field, value in children_update.model_dump(exclude_unset=True).items():
+        setattr(db_children, field, value)
+    # Incremented in SQL, so concurrent updates never reuse a version
+    db_children.version = Children.version + 1
+    db.commit()
+    db.refresh(db_children)
+    return db_children
+
+
+def delete_children(db: Session, children_id: int, user_id: int) -> bool:
+    """Delete children; the database cascades the delete to its diagnose histories"""
+    result = db.execute(
+        delete(Children)
+        .where(Children.id == children_id, Children.user_id == user_id)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount > 0
+
+
+# Diagnose history operations
+def create_diagnose(db: Session, children_id: int, diagnose: DiagnoseRequest, result: str) -> DiagnoseHistory:
+    """Store diagnose result of children"""
+    db_diagnose = DiagnoseHistory(children_id=children_id, result=result, **diagnose.model_dump())
+    db.add(db_diagnose)
+    db.commit()
+    db.refresh(db_diagnose)
+    return db_diagnose
+
+
+DIAGNOSE_RESPONSE_COLUMNS = (
+    DiagnoseHistory.id,
+    DiagnoseHistory.children_id,
+    DiagnoseHistory.age_on_month,
+    DiagnoseHistory.gender,
+    DiagnoseHistory.height,
+    DiagnoseHistory.result,
+    DiagnoseHistory.diagnosed_at,
+)
+
+
+def get_owned_children_ids(db: Session, user_id: int, children_ids: List[int]) -> set:
+    """Ids among ``children_ids`` that belong to the user, in one IN query"""
+    if not children_ids:
+        return set()
+    return set(db.scalars(
+        select(Children.id).where(Children.user_id == user_id, Children.id.in_(set(children_ids)))
+    ))
+
+
+def create_diagnoses(db: Session, rows: List[dict]) -> list:
+    """
+    Store many diagnose results (dicts of DiagnoseHistory columns) with one
+    bulk INSERT in one transaction; returns the stored rows in input order.
+    """
+    if not rows:
+        return []
+    if db.get_bind().dialect.insert_executemany_returning:
+        # RETURNING order is arbitrary, but ids are assigned in VALUES order.
+        # (sort_by_parameter_order would make SQLite insert row by row.)
+        statement = insert(DiagnoseHistory).returning(*DIAGNOSE_RESPONSE_COLUMNS)
+        stored = sorted(db.execute(statement, rows).all(), key=lambda row: row.id)
+    else:
+        stored = insert_diagnoses_read_back(db, rows)
+    db.commit()
+    return stored
+
+
+def insert_diagnoses_read_back(db: Session, rows: List[dict]) -> list:
+    """
+    Bulk INSERT for dialects without INSERT RETURNING (MySQL): the batch is
+    stamped with the database clock and a random batch_token, inserted with
+    one executemany and read back by that token. Rows of concurrent batches
+    (visible under READ COMMITTED) never match. The lookup stays on the
+    (children_id, diagnosed_at, id) index; the token only filters. Does not
+    commit.
+    """
+    diagnosed_at = db.scalar(select(func.now()))
+    batch_token = uuid.uuid4().hex
+    db.execute(
+        insert(DiagnoseHistory),
+        [{**row, "diagnosed_at": diagnosed_at, "batch_token": batch_token} for row in rows],
+    )
+    return db.execute(
+        select(*DIAGNOSE_RESPONSE_COLUMNS)
+        .where(
+            DiagnoseHistory.children_id.in_({row["children_id"] for row in rows}),
+            DiagnoseHistory.diagnosed_at == diagnosed_at,
+            DiagnoseHistory.batch_token == batch_token,
+        )
+        .order_by(DiagnoseHistory.id)
+    ).all()
+
+
+def get_diagnose_page(
+    db: Session,
+    children_id: int,
+    limit: int,
+    cursor: Optional[str] = None
+) -> Tuple[List[DiagnoseHistory], Optional[str]]:
+    """
+    Newest-first page of a child's diagnose histories: one range scan on
+    (children_id, diagnosed_at, id) that seeks past the cursor (on SQLite
+    the child's rows are sorted instead, see keyset_datetime).
+    """
+    query = select(DiagnoseHistory).where(DiagnoseHistory.children_id == children_id)
+    keyed = keyset_datetime(DiagnoseHistory.diagnosed_at)
+    if cursor:
+        diagnosed_at, last_id = decode_cursor(cursor, "diagnosed_at", "desc")
+        bound = keyset_datetime(diagnosed_at)
+        query = query.where(or_(keyed < bound, and_(keyed == bound, DiagnoseHistory.id < last_id)))
+    query = query.order_by(keyed.desc(), DiagnoseHistory.id.desc()).limit(limit + 1)
+    return split_page(list(db.execute(query).scalars()), limit, "diagnosed_at", "desc")
+
+
+def get_diagnose(db: Session, children_id: int, diagnose_id: int) -> Optional[DiagnoseHistory]:
+    """Get diagnose history of children by ID"""
+    return db.query(DiagnoseHistory).filter(
+        DiagnoseHistory.id == diagnose_id, DiagnoseHistory.children_id == children_id
+    ).first()
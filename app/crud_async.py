@@ -0,0 +1,226 @@
+"""
+Async counterparts of app.crud for routers running on AsyncSession (get_async_db)
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+from app.config import settings
+from app.models import ClaimsRevocation, RefreshToken, User
+from app.schemas import UserCreate, UserUpdate
+from app.crud import (
+    USER_RESPONSE_COLUMNS,
+    VersionConflict,
+    split_page,
+    user_invalidation_rows,
+    user_update_statement,
+    users_page_queries,
+)
+from app.auth import (
+    generate_refresh_token,
+    get_password_hash_async,
+    hash_refresh_token,
+)
+
+
+# User CRUD operations
+async def create_user(db: AsyncSession, user: UserCreate, hashed_password: Optional[str] = None) -> User:
+    """Create new user"""
+    if hashed_password is None:
+        hashed_password = await get_password_hash_async(user.password)
+    db_user = User(
+        avatar_type=user.avatar_type,
+        name=user.name,
+        username=user.username,
+        address=user.address,
+        dob=user.dob,
+        gender=user.gender,
+        password=hashed_password
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+    """Get user by username"""
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalars().first()
+
+
+async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
+    """Get user by ID"""
+    return await db.get(User, user_id)
+
+
+async def get_all_users(db: AsyncSession) -> List[User]:
+    """Get all users (Admin only)"""
+    result = await db.execute(select(User))
+    return list(result.scalars().all())
+
+
+async def get_users_page(
+    db: AsyncSession,
+    limit: int,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    order: str = "asc",
+    **filters
+) -> Tuple[List[User], Optional[str]]:
+    """One page of users and the cursor of the next page (None on the last page)"""
+    users = []
+    for query in users_page_queries(cursor=cursor, sort=sort, order=order, **filters):
+        # One extra row tells whether there is a next page
+        result = await db.execute(query.limit(limit + 1 - len(users)))
+        users += result.scalars().all()
+        if len(users) > limit:
+            break
+    return split_page(users, limit, sort, order)
+
+
+async def delete_user(db: AsyncSession, user_id: int) -> bool:
+    """Delete user (Admin only)"""
+    db_user = await get_user_by_id(db, user_id)
+    if not db_user:
+        return False
+
+    username = db_user.username
+    await db.delete(db_user)
+    await db.commit()
+    await invalidate_user(db, user_id, [username], revokes_claims=True)
+    return True
+
+
+async def invalidate_user(
+    db: AsyncSession,
+    user_id: int,
+    usernames: List[Optional[str]],
+    revokes_claims: bool = False
+) -> None:
+    """Make a committed user change visible to every process (see app.crud.invalidate_user)"""
+    await db.execute(insert(ClaimsRevocation), user_invalidation_rows(user_id, usernames, revokes_claims))
+    await db.commit()
+
+
+async def update_user(
+    db: AsyncSession,
+    user_id: int,
+    user_update: UserUpdate,
+    expected_version: Optional[int] = None
+):
+    """Update user in one UPDATE ... RETURNING where supported (see app.crud.update_user)"""
+    update_data = user_update.model_dump(exclude_unset=True)
+    old_username = None
+    if "username" in update_data:
+        old_username = (await db.execute(select(User.username).where(User.id == user_id))).scalar()
+
+    if not update_data:
+        query = select(*USER_RESPONSE_COLUMNS).where(User.id == user_id)
+        if expected_version is not None:
+            query = query.where(User.version == expected_version)
+        row = (await db.execute(query)).first()
+    elif db.bind.dialect.update_returning:
+        statement = user_update_statement(user_id, update_data, expected_version)
+        row = (await db.execute(statement.returning(*USER_RESPONSE_COLUMNS))).first()
+    else:
+        statement = user_update_statement(user_id, update_data, expected_version)
+        updated = (await db.execute(statement)).rowcount
+        row = None
+        if updated:
+            row = (await db.execute(select(*USER_RESPONSE_COLUMNS).where(User.id == user_id))).first()
+
+    if row is None:
+        await db.rollback()
+        if expected_version is not None:
+            current_version = (await db.execute(select(User.version).where(User.id == user_id))).scalar()
+            if current_version is not None:
+                raise VersionConflict(current_version)
+        return None
+
+    await db.commit()
+    if update_data:
+        await invalidate_user(db, user_id, [old_username, row.username], revokes_claims="is_admin" in update_data)
+    return row
+
+
+async def update_user_password(
+    db: AsyncSession,
+    user_id: int,
+    new_password: str,
+    hashed_password: Optional[str] = None
+) -> Optional[User]:
+    """Update user password"""
+    db_user = await get_user_by_id(db, user_id)
+    if not db_user:
+        return None
+
+    if hashed_password is None:
+        hashed_password = await get_password_hash_async(new_password)
+    db_user.password = hashed_password
+    # A new password logs out every device holding a refresh token
+    await db.execute(delete(RefreshToken).where(RefreshToken.user_id == user_id))
+    await db.commit()
+    await db.refresh(db_user)
+    await invalidate_user(db, user_id, [db_user.username])
+    return db_user
+
+
+# Refresh token operations
+async def create_refresh_token(db: AsyncSession, user_id: int) -> str:
+    """Issue new refresh token for user and return the raw token"""
+    token = generate_refresh_token()
+    db.add(RefreshToken(
+        user_id=user_id,
+        token_hash=hash_refresh_token(token),
+        expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    await db.commit()
+    return token
+
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> Optional[Tuple[object, str]]:
+    """
+    Exchange refresh token for a new one.
+    Returns (user row with id/username/is_admin, new raw token), or None when
+    the token is unknown, expired or was already used.
+    """
+    result = await db.execute(
+        select(
+            RefreshToken.id.label("token_id"),
+            RefreshToken.expires_at,
+            User.id,
+            User.username,
+            User.is_admin,
+        )
+        .join(User, User.id == RefreshToken.user_id)
+        .where(RefreshToken.token_hash == hash_refresh_token(token))
+    )
+    row = result.first()
+    if row is None:
+        return None
+
+    # Deleting first makes every token single-use even under concurrent refreshes
+    deleted = await db.execute(delete(RefreshToken).where(RefreshToken.id == row.token_id))
+    if not deleted.rowcount or row.expires_at <= datetime.utcnow():
+        await db.commit()
+        return None
+
+    new_token = generate_refresh_token()
+    db.add(RefreshToken(
+        user_id=row.id,
+        token_hash=hash_refresh_token(new_token),
+        expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    await db.commit()
+    return row, new_token
+
+
+async def prune_expired_refresh_tokens(db: AsyncSession) -> int:
+    """Delete expired refresh tokens, return number of removed rows"""
+    result = await db.execute(
+        delete(RefreshToken).where(RefreshToken.expires_at <= datetime.utcnow())
+    )
+    await db.commit()
+    return result.rowcount
@@ -1,15 +1,62 @@
-from sqlalchemy import create_engine
+from typing import Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, SingletonThreadPool, StaticPool
 from app.config import settings
+from app.pool_metrics import PoolMetrics
+from app.sql_metrics import instrument_engine
+
+# Pools without pool_size / max_overflow / pool_timeout
+SIZELESS_POOLS = (NullPool, SingletonThreadPool, StaticPool)
+
+
+def pool_options(url: str, metrics: Optional[PoolMetrics] = None) -> dict:
+    """Connection pool arguments for create_engine from Settings"""
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    parsed = make_url(url)
+    if issubclass(parsed.get_dialect().get_pool_class(parsed), SIZELESS_POOLS):
+        # In-memory SQLite and aiosqlite files use a single connection or no
+        # pool at all; these pools reject the sizing arguments
+        return options
+    options.update({
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    })
+    if metrics is not None:
+        options["poolclass"] = metrics.pool_class()
+    return options
+
+
+def enable_sqlite_foreign_keys(engine: Engine) -> None:
+    """SQLite only honours ON DELETE CASCADE when foreign keys are enabled per connection"""
+    if engine.dialect.name != "sqlite":
+        return
+    
+    @event.listens_for(engine, "connect")
+    def set_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
 
 # Create database engine
+pool_metrics = PoolMetrics()
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    echo=settings.ENVIRONMENT == "development"
+    echo=settings.ENVIRONMENT == "development",
+    **pool_options(settings.DATABASE_URL, pool_metrics)
 )
+pool_metrics.attach(engine)
+enable_sqlite_foreign_keys(engine)
+if settings.SQL_METRICS_ENABLED:
+    instrument_engine(engine)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -17,6 +64,49 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Create Base class for models
 Base = declarative_base()
 
+# Sync driver -> async driver used when ASYNC_DATABASE_URL is not set
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+_async_engine: Optional[AsyncEngine] = None
+_AsyncSessionLocal: Optional[async_sessionmaker] = None
+
+
+def get_async_database_url() -> str:
+    """Async variant of DATABASE_URL"""
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    url = make_url(settings.DATABASE_URL)
+    driver = ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Async engine, created on first use so the async driver is only
+    required by processes that actually serve async endpoints.
+    """
+    global _async_engine, _AsyncSessionLocal
+    
+    if _async_engine is None:
+        async_url = get_async_database_url()
+        _async_engine = create_async_engine(
+            async_url,
+            echo=settings.ENVIRONMENT == "development",
+            **pool_options(async_url)
+        )
+        enable_sqlite_foreign_keys(_async_engine.sync_engine)
+        if settings.SQL_METRICS_ENABLED:
+            instrument_engine(_async_engine.sync_engine)
+        _AsyncSessionLocal = async_sessionmaker(
+            _async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
+
 
 def get_db():
     """Dependency to get database session"""
@@ -25,3 +115,20 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency to get async database session (for async def routers)"""
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    """Close pooled async connections"""
+    global _async_engine, _AsyncSessionLocal
+    
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _AsyncSessionLocal = None
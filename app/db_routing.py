@@ -0,0 +1,221 @@
+"""
+Primary/replica session routing for read-only endpoints
+
+Read-your-writes: every commit on a get_write_db session hands the client a
+short-lived signed "read from primary until" token (cookie, echoed in a
+response header for clients without a cookie jar). get_read_db in any worker
+honours it, so the caller's next reads skip replicas that may still lag.
+"""
+
+import hashlib
+import hmac
+import itertools
+import threading
+import time
+from typing import List, Optional
+
+from fastapi import Depends, Request, Response
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.auth import Identity, get_current_identity
+from app.cache import LRUCache
+from app.config import settings
+from app.database import SessionLocal, enable_sqlite_foreign_keys, pool_options
+from app.sql_metrics import instrument_engine
+
+
+class ReplicaRouter:
+    """
+    Round-robin over healthy replicas.
+
+    A replica is marked unhealthy when a connection to it fails (either in
+    the periodic health check or when a request checks out a connection)
+    and is skipped until a health check succeeds again.
+    """
+
+    def __init__(self, urls: List[str]):
+        self.urls = urls
+        self.engines = [
+            create_engine(url, echo=settings.ENVIRONMENT == "development", **pool_options(url))
+            for url in urls
+        ]
+        for replica_engine in self.engines:
+            enable_sqlite_foreign_keys(replica_engine)
+            if settings.SQL_METRICS_ENABLED:
+                instrument_engine(replica_engine)
+        self.sessionmakers = [
+            sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+            for replica_engine in self.engines
+        ]
+        self._healthy = [True] * len(urls)
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        # User IDs that wrote recently and must read their own writes
+        self._recent_writers = LRUCache(
+            max_size=settings.PRINCIPAL_CACHE_SIZE,
+            ttl_seconds=settings.REPLICA_STICKY_SECONDS,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.engines)
+
+    def mark_write(self, user_id: Optional[int]) -> None:
+        if user_id is not None:
+            self._recent_writers.set(user_id, True)
+
+    def is_sticky(self, user_id: Optional[int]) -> bool:
+        return user_id is not None and self._recent_writers.get(user_id) is not None
+
+    def mark_unhealthy(self, index: int) -> None:
+        with self._lock:
+            self._healthy[index] = False
+
+    def pick(self) -> Optional[int]:
+        """Index of next healthy replica, or None when all are down"""
+        for _ in range(len(self.engines)):
+            index = next(self._counter) % len(self.engines)
+            if self._healthy[index]:
+                return index
+        return None
+
+    def check_health(self) -> List[bool]:
+        """Ping every replica once and update its health flag"""
+        for index, replica_engine in enumerate(self.engines):
+            try:
+                with replica_engine.connect() as connection:
+                    connection.execute(text("SELECT 1"))
+                healthy = True
+            except DBAPIError:
+                healthy = False
+            with self._lock:
+                self._healthy[index] = healthy
+        return list(self._healthy)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "replicas": [
+                    {"url": replica_engine.url.render_as_string(hide_password=True), "healthy": healthy}
+                    for replica_engine, healthy in zip(self.engines, self._healthy)
+                ],
+                "sticky_users": len(self._recent_writers),
+            }
+
+    def dispose(self) -> None:
+        for replica_engine in self.engines:
+            replica_engine.dispose()
+
+
+replica_router = ReplicaRouter(settings.DATABASE_REPLICA_URLS)
+
+
+# Client-carried read-your-writes token: "<user_id>.<until epoch>.<signature>"
+STICKY_COOKIE = "read_primary_until"
+STICKY_HEADER = "X-Read-Primary-Until"
+
+
+def _sticky_signature(user_id: int, until: int) -> str:
+    message = f"read-primary:{user_id}.{until}".encode('utf-8')
+    return hmac.new(settings.SECRET_KEY.encode('utf-8'), message, hashlib.sha256).hexdigest()[:32]
+
+
+def sticky_token(user_id: int, until: int) -> str:
+    """Signed token pinning this user's reads to the primary until ``until``"""
+    return f"{user_id}.{until}.{_sticky_signature(user_id, until)}"
+
+
+def sticky_token_valid(token: Optional[str], user_id: Optional[int]) -> bool:
+    """True for an unexpired token issued to this user"""
+    if not token or user_id is None:
+        return False
+    try:
+        token_user_id, until, signature = token.split(".")
+        token_user_id, until = int(token_user_id), int(until)
+    except ValueError:
+        return False
+    return (
+        token_user_id == user_id
+        and until > time.time()
+        and hmac.compare_digest(signature, _sticky_signature(user_id, until))
+    )
+
+
+def _set_sticky_token(response: Response, user_id: int) -> None:
+    until = int(time.time()) + settings.REPLICA_STICKY_SECONDS
+    token = sticky_token(user_id, until)
+    response.set_cookie(
+        STICKY_COOKIE, token,
+        max_age=settings.REPLICA_STICKY_SECONDS, httponly=True, samesite="lax",
+    )
+    response.headers[STICKY_HEADER] = token
+
+
+def _replica_session() -> Optional[Session]:
+    """Session on a healthy replica with its connection already checked out"""
+    while True:
+        index = replica_router.pick()
+        if index is None:
+            return None
+        db = replica_router.sessionmakers[index]()
+        try:
+            # Check out now (pre-ping included) so a dead replica falls back
+            # to the primary instead of failing the request
+            db.connection()
+            return db
+        except DBAPIError:
+            db.close()
+            replica_router.mark_unhealthy(index)
+
+
+def open_read_session(user_id: Optional[int] = None, sticky: bool = False) -> Session:
+    """
+    Replica session (primary when none is healthy, the user wrote recently
+    through this worker, or ``sticky`` is set); caller closes it.
+    """
+    db = None
+    if replica_router.enabled and not sticky and not replica_router.is_sticky(user_id):
+        db = _replica_session()
+    if db is None:
+        db = SessionLocal()
+    return db
+
+
+def read_primary_requested(request: Request, user_id: Optional[int]) -> bool:
+    """Whether the request carries a valid read-your-writes token for this user"""
+    token = request.cookies.get(STICKY_COOKIE) or request.headers.get(STICKY_HEADER)
+    return sticky_token_valid(token, user_id)
+
+
+def get_read_db(request: Request, current_user: Identity = Depends(get_current_identity)):
+    """
+    Dependency to get database session for read-only endpoints.
+    Uses a replica when configured, unless the caller wrote recently.
+    """
+    sticky = replica_router.enabled and read_primary_requested(request, current_user.id)
+    db = open_read_session(current_user.id, sticky=sticky)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_write_db(response: Response, current_user: Identity = Depends(get_current_identity)):
+    """
+    Dependency to get primary database session for endpoints that write.
+    Each commit pins the caller's reads to the primary for REPLICA_STICKY_SECONDS,
+    in this worker and, through the signed token, in every other one.
+    """
+    db = SessionLocal()
+    if replica_router.enabled:
+        def pin_reads_to_primary(session):
+            replica_router.mark_write(current_user.id)
+            _set_sticky_token(response, current_user.id)
+
+        event.listen(db, "after_commit", pin_reads_to_primary)
+    try:
+        yield db
+    finally:
+        db.close()
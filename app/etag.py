@@ -0,0 +1,75 @@
+"""
+ETag helpers for versioned resources (weak ETags built from the row version)
+"""
+
+import hashlib
+import re
+from typing import Iterable, List, Optional
+
+from fastapi import HTTPException, Response, status
+
+
+def versioned_etag(kind: str, resource_id: int, version: int) -> str:
+    """Weak ETag of one version of a resource, e.g. W/"user-7-v3" """
+    return f'W/"{kind}-{resource_id}-v{version}"'
+
+
+def collection_etag(kind: str, owner_id: int, parts: Iterable) -> str:
+    """Weak ETag of a list response, from what identifies each item's version (e.g. id + updated_at)"""
+    digest = hashlib.sha1(repr(list(parts)).encode()).hexdigest()[:16]
+    return f'W/"{kind}-{owner_id}-{digest}"'
+
+
+def parse_etags(header: Optional[str]) -> List[str]:
+    """Entity tags listed in an If-Match / If-None-Match header, without the W/ prefix"""
+    if not header:
+        return []
+    tags = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag:
+            tags.append(tag)
+    return tags
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Weak comparison of ``etag`` against an If-None-Match header"""
+    tags = parse_etags(header)
+    return "*" in tags or parse_etags(etag)[0] in tags
+
+
+def not_modified(if_none_match: Optional[str], etag: str) -> Optional[Response]:
+    """304 response when the client's copy is current, so the body is never serialized"""
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return None
+
+
+def expected_version(if_match: Optional[str], kind: str, resource_id: int) -> Optional[int]:
+    """
+    Version the client based its edit on, from If-Match (weak comparison).
+    None when the header is absent or "*"; 412 when it names no version of this resource.
+    """
+    tags = parse_etags(if_match)
+    if not tags or "*" in tags:
+        return None
+    pattern = re.compile(rf'^"{re.escape(kind)}-{resource_id}-v(\d+)"$')
+    for tag in tags:
+        match = pattern.match(tag)
+        if match:
+            return int(match.group(1))
+    raise HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="If-Match does not match this resource"
+    )
+
+
+def version_conflict(kind: str, resource_id: int, current_version: int) -> HTTPException:
+    """412 carrying the current ETag, so the client can re-fetch and retry its edit"""
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Resource was modified by another request",
+        headers={"ETag": versioned_etag(kind, resource_id, current_version)},
+    )
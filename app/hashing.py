@@ -0,0 +1,122 @@
+"""
+Dedicated worker pool for bcrypt hashing and verification.
+
+bcrypt is deliberately slow, so running it inline in a handler pins one slot
+of the general request threadpool for the whole computation. Login storms then
+starve every other endpoint. This service runs hashing in its own small
+threadpool (the ``bcrypt`` package releases the GIL while hashing, so threads
+scale across cores) behind a bounded queue: once the queue is full new work is
+rejected with 503 instead of piling up.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+
+
+class PasswordHashingService:
+    """Bounded executor for CPU-heavy password hashing work"""
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_run = 0.0
+        self._max_run = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="bcrypt",
+                )
+            return self._executor
+
+    def _reserve_slot(self) -> None:
+        """Reserve a place in the pool or raise 503 when the queue is full"""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Server is busy, please try again",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+
+    def _record(self, wait: float, run: float) -> None:
+        with self._lock:
+            self._completed += 1
+            self._total_wait += wait
+            self._total_run += run
+            self._max_wait = max(self._max_wait, wait)
+            self._max_run = max(self._max_run, run)
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run ``func(*args)`` on the hashing pool and await its result"""
+        self._reserve_slot()
+        enqueued_at = time.perf_counter()
+
+        def job():
+            started_at = time.perf_counter()
+            with self._lock:
+                self._in_flight += 1
+            try:
+                return func(*args), started_at - enqueued_at, time.perf_counter() - started_at
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+
+        try:
+            loop = asyncio.get_running_loop()
+            result, wait, run = await loop.run_in_executor(self._get_executor(), job)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+        self._record(wait, run)
+        return result
+
+    def stats(self) -> dict:
+        """Snapshot of queue depth and latency counters"""
+        with self._lock:
+            completed = self._completed or 1
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queue_depth": self._pending - self._in_flight,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._total_wait / completed * 1000, 3),
+                "max_wait_ms": round(self._max_wait * 1000, 3),
+                "avg_run_ms": round(self._total_run / completed * 1000, 3),
+                "max_run_ms": round(self._max_run * 1000, 3),
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+# Global hashing service instance (one pool per worker process)
+hashing_service = PasswordHashingService(
+    max_workers=settings.HASH_WORKERS,
+    max_queue=settings.HASH_QUEUE_SIZE,
+)
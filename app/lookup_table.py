@@ -0,0 +1,152 @@
+"""
+Precomputed prediction table over the whole quantized input space
+
+The model only ever sees 2 genders x 61 months (0-60) x heights measured to
+0.1 cm. ``build_lookup_table`` evaluates the loaded model once on every
+(gender, month, height) cell for 40-130 cm and stores the class indexes as a
+uint8 array of shape (2, 61, 901), about 110 KB, next to the model file. The
+file name carries the model file's hash, so a table never outlives its model.
+At runtime the table is memory-mapped (shared by all workers through the page
+cache) and a prediction is one array index; inputs outside the grid still go
+to the live model.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+GENDERS = ("L", "P")
+MAX_AGE_ON_MONTH = 60
+MIN_HEIGHT = 40.0
+MAX_HEIGHT = 130.0
+# Heights are stored in tenths of a centimetre
+HEIGHT_STEPS = int(round((MAX_HEIGHT - MIN_HEIGHT) * 10)) + 1
+
+
+def table_paths(model_path: str, model_hash: str) -> Tuple[str, str]:
+    """(table .npy, metadata .json) paths for a model file and its SHA256"""
+    stem = os.path.splitext(model_path)[0]
+    prefix = f"{stem}.{model_hash[:16]}.lut"
+    return prefix + ".npy", prefix + ".json"
+
+
+def grid_keys() -> List[tuple]:
+    """Every normalized (age_on_month, gender, height) key, in table order"""
+    heights = [(int(MIN_HEIGHT * 10) + step) / 10 for step in range(HEIGHT_STEPS)]
+    return [
+        (age_on_month, gender, height)
+        for gender in GENDERS
+        for age_on_month in range(MAX_AGE_ON_MONTH + 1)
+        for height in heights
+    ]
+
+
+def build_lookup_table(predictor) -> str:
+    """Evaluate ``predictor``'s model on the whole grid and write the table; returns its path"""
+    if not predictor.ready:
+        raise RuntimeError("Stunting predictor is not initialized or trained")
+    keys = grid_keys()
+    rows = np.array([predictor.features(*key) for key in keys], dtype=np.float64)
+    labels = np.asarray(predictor.model.predict(rows)).astype(str)
+    classes, indexes = np.unique(labels, return_inverse=True)
+    if len(classes) > 255:
+        raise ValueError("Too many classes for a uint8 table")
+
+    table_path, metadata_path = table_paths(predictor.path, predictor.model_hash)
+    # Written under temporary names and renamed, so workers never map a partial file
+    table = np.lib.format.open_memmap(
+        table_path + ".tmp", mode="w+", dtype=np.uint8,
+        shape=(len(GENDERS), MAX_AGE_ON_MONTH + 1, HEIGHT_STEPS),
+    )
+    table[:] = indexes.reshape(table.shape)
+    table.flush()
+    del table
+    metadata = {
+        "model_hash": predictor.model_hash,
+        "classes": [str(label) for label in classes],
+        "genders": list(GENDERS),
+        "max_age_on_month": MAX_AGE_ON_MONTH,
+        "min_height": MIN_HEIGHT,
+        "max_height": MAX_HEIGHT,
+        "height_step": 0.1,
+    }
+    with open(metadata_path + ".tmp", "w") as metadata_file:
+        json.dump(metadata, metadata_file, indent=2)
+    os.replace(metadata_path + ".tmp", metadata_path)
+    os.replace(table_path + ".tmp", table_path)
+    return table_path
+
+
+class LookupTable:
+    """Memory-mapped class table built by ``build_lookup_table``"""
+
+    def __init__(self, path: str, table: np.ndarray, classes: List[str]):
+        self.path = path
+        self.table = table
+        self.classes = np.array(classes, dtype=object)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._out_of_grid = 0
+
+    @classmethod
+    def open(cls, model_path: str, model_hash: str) -> Optional["LookupTable"]:
+        """Table built for exactly this model file, or None when there is none"""
+        table_path, metadata_path = table_paths(model_path, model_hash)
+        if not os.path.exists(table_path) or not os.path.exists(metadata_path):
+            return None
+        with open(metadata_path) as metadata_file:
+            metadata = json.load(metadata_file)
+        if metadata.get("model_hash") != model_hash:
+            return None
+        table = np.load(table_path, mmap_mode="r")
+        if table.shape != (len(GENDERS), MAX_AGE_ON_MONTH + 1, HEIGHT_STEPS):
+            return None
+        return cls(table_path, table, metadata["classes"])
+
+    def label(self, key: tuple) -> Optional[str]:
+        """Label for one normalized key; plain indexing, no array set-up"""
+        age_on_month, gender, height = key
+        step = int(round(height * 10)) - int(MIN_HEIGHT * 10)
+        in_grid = gender in GENDERS and 0 <= age_on_month <= MAX_AGE_ON_MONTH and 0 <= step < HEIGHT_STEPS
+        with self._lock:
+            if in_grid:
+                self._hits += 1
+            else:
+                self._out_of_grid += 1
+        if not in_grid:
+            return None
+        return self.classes[self.table[GENDERS.index(gender), age_on_month, step]]
+
+    def labels(self, keys: List[tuple]) -> List[Optional[str]]:
+        """Labels for normalized keys (see StuntingPredictor.cache_key); None outside the grid"""
+        if len(keys) == 1:
+            return [self.label(keys[0])]
+        if not keys:
+            return []
+        ages = np.array([key[0] for key in keys], dtype=np.intp)
+        genders = np.array([GENDERS.index(key[1]) if key[1] in GENDERS else -1 for key in keys], dtype=np.intp)
+        steps = np.rint(np.array([key[2] for key in keys], dtype=np.float64) * 10).astype(np.intp) - int(MIN_HEIGHT * 10)
+        in_grid = (
+            (genders >= 0)
+            & (ages >= 0) & (ages <= MAX_AGE_ON_MONTH)
+            & (steps >= 0) & (steps < HEIGHT_STEPS)
+        )
+        found = np.full(len(keys), None, dtype=object)
+        found[in_grid] = self.classes[self.table[genders[in_grid], ages[in_grid], steps[in_grid]]]
+        with self._lock:
+            hits = int(in_grid.sum())
+            self._hits += hits
+            self._out_of_grid += len(keys) - hits
+        return list(found)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "path": os.path.basename(self.path),
+                "size_bytes": int(self.table.nbytes),
+                "hits": self._hits,
+                "out_of_grid": self._out_of_grid,
+            }
@@ -1,13 +1,29 @@
+# isort: off
+# Must stay the first import: creating startup_timer starts the startup clock,
+# so the "imports" mark below covers loading FastAPI, SQLAlchemy and the app
+from app.startup import check_schema_revision, startup_timer
+# isort: on
+import asyncio
+import time
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
-from app.api import auth, profile
-from app.database import engine
-from app.models import Base
+from app.api import admin, auth, children, profile, users
+from app.auth import apply_claims_revocations, configure_bcrypt_rounds
+from app.crud import get_claims_revocations, prune_claims_revocations, prune_expired_refresh_tokens
+from app.database import SessionLocal, dispose_async_engine, engine
+from app.db_routing import replica_router
+from app.pool_metrics import warm_up_pool
+from app.predictor import prediction_batcher, stunting_predictor
+from app.hashing import hashing_service
+from app.responses import get_default_response_class
+from app.sql_metrics import QueryStatsMiddleware
 from app.config import settings
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Schema is managed by Alembic only (alembic upgrade head); workers just
+# verify the revision at startup instead of reflecting/creating tables
+startup_timer.mark("imports")
 
 # Initialize stunting predictor
 print("🚀 Starting Stunting Checking App...")
@@ -18,11 +34,15 @@ app = FastAPI(
     description="API untuk aplikasi deteksi stunting pada anak",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=get_default_response_class()
 )
 
 app.add_middleware(ProxyHeadersMiddleware, trusted_hosts="*")
 
+if settings.SQL_METRICS_ENABLED:
+    app.add_middleware(QueryStatsMiddleware, expose_headers=settings.SQL_METRICS_HEADERS)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -30,11 +50,179 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 # Include routers
 app.include_router(auth.router, prefix="/api")
 app.include_router(profile.router, prefix="/api")
+app.include_router(children.router, prefix="/api")
+app.include_router(users.router, prefix="/api/users", tags=["users"])
+app.include_router(admin.router, prefix="/api")
+
+
+@app.on_event("startup")
+def check_database_schema():
+    """Verify the database is migrated to the Alembic head revision"""
+    if settings.FAST_START or settings.SCHEMA_CHECK == "off":
+        return
+    try:
+        schema = check_schema_revision(engine)
+    except Exception as e:
+        # A slow or unreachable database must not crash-loop the worker
+        print(f"⚠️  Schema revision check failed: {e}")
+        return
+    finally:
+        startup_timer.mark("schema check")
+    
+    if not schema["up_to_date"]:
+        message = (
+            f"Database schema revision {schema['current']} does not match "
+            f"code head {', '.join(schema['head'])}; run 'alembic upgrade head'"
+        )
+        if settings.SCHEMA_CHECK == "strict":
+            raise RuntimeError(message)
+        print(f"⚠️  {message}")
+
+
+@app.on_event("startup")
+def configure_bcrypt_cost():
+    """Use fixed BCRYPT_ROUNDS or calibrate the cost for this machine"""
+    rounds = configure_bcrypt_rounds()
+    startup_timer.mark("bcrypt cost")
+    if settings.BCRYPT_ROUNDS:
+        print(f"🔐 bcrypt cost factor: {rounds}")
+    else:
+        print(f"🔐 bcrypt cost factor: {rounds} (calibrated; pin it with BCRYPT_ROUNDS, see scripts/bcrypt_cost_report.py)")
+
+
+def _prune_refresh_tokens() -> int:
+    db = SessionLocal()
+    try:
+        prune_claims_revocations(db)
+        return prune_expired_refresh_tokens(db)
+    finally:
+        db.close()
+
+
+async def prune_refresh_tokens_periodically():
+    """Background loop removing expired refresh tokens (and stale claims revocations)"""
+    while True:
+        try:
+            await run_in_threadpool(_prune_refresh_tokens)
+        except Exception as e:
+            print(f"⚠️  Refresh token pruning failed: {e}")
+        await asyncio.sleep(settings.REFRESH_TOKEN_PRUNE_INTERVAL_SECONDS)
+
+
+# Rows recorded this long before the previous poll are read again, so a row
+# committed late (or stamped by a slightly slower clock) is not missed
+CLAIMS_REVOCATION_POLL_OVERLAP_SECONDS = 60
+_claims_revocations_polled_at = None
+
+
+def _load_claims_revocations() -> None:
+    global _claims_revocations_polled_at
+    
+    polled_at = time.time()
+    since = None
+    if _claims_revocations_polled_at is not None:
+        since = _claims_revocations_polled_at - CLAIMS_REVOCATION_POLL_OVERLAP_SECONDS
+    db = SessionLocal()
+    try:
+        apply_claims_revocations(get_claims_revocations(db, since))
+    finally:
+        db.close()
+    _claims_revocations_polled_at = polled_at
+
+
+async def poll_claims_revocations_periodically():
+    """Background loop picking up user changes and claims revocations made by other workers and set_admin.py"""
+    while True:
+        try:
+            await run_in_threadpool(_load_claims_revocations)
+        except Exception as e:
+            print(f"⚠️  Claims revocation poll failed: {e}")
+        await asyncio.sleep(settings.CLAIMS_REVOCATION_POLL_SECONDS)
+
+
+@app.on_event("startup")
+def load_stunting_predictor():
+    """Load the ML model once per worker (memory-mapped, shared via the page cache)"""
+    if stunting_predictor.load():
+        print(f"🤖 Stunting predictor ready ({stunting_predictor.engine}, {stunting_predictor.load_ms:.0f} ms, model {stunting_predictor.model_hash[:12]})")
+        if stunting_predictor.lookup_table is not None:
+            print(f"📦 Prediction lookup table mapped: {stunting_predictor.lookup_table.path}")
+    else:
+        print(f"⚠️  Stunting predictor not ready: {stunting_predictor.load_error}")
+    startup_timer.mark("predictor")
+
+
+@app.on_event("startup")
+def warm_up_database_pool():
+    """Open pooled connections before the first request arrives"""
+    if settings.FAST_START or settings.DB_POOL_WARMUP <= 0:
+        return
+    try:
+        opened = warm_up_pool(engine, settings.DB_POOL_WARMUP)
+        print(f"🔌 Database pool warmed up with {opened} connections")
+    except Exception as e:
+        print(f"⚠️  Database pool warm-up failed: {e}")
+    finally:
+        startup_timer.mark("pool warm-up")
+
+
+async def check_replicas_periodically():
+    """Background loop refreshing read replica health flags"""
+    while True:
+        try:
+            await run_in_threadpool(replica_router.check_health)
+        except Exception as e:
+            print(f"⚠️  Replica health check failed: {e}")
+        await asyncio.sleep(settings.REPLICA_HEALTH_CHECK_SECONDS)
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    """Start periodic maintenance tasks"""
+    app.state.background_tasks = [asyncio.create_task(prune_refresh_tokens_periodically())]
+    app.state.background_tasks.append(asyncio.create_task(poll_claims_revocations_periodically()))
+    if replica_router.enabled:
+        app.state.background_tasks.append(asyncio.create_task(check_replicas_periodically()))
+
+
+@app.on_event("startup")
+def report_startup_time():
+    """Report how long this worker took to become ready (registered last)"""
+    startup_timer.mark("background tasks")
+    startup_timer.report(settings.STARTUP_BUDGET_MS)
+
+
+@app.on_event("shutdown")
+def shutdown_hashing_pool():
+    """Release password hashing worker threads"""
+    hashing_service.shutdown()
+
+
+@app.on_event("shutdown")
+def shutdown_prediction_batcher():
+    """Release the prediction worker thread"""
+    prediction_batcher.shutdown()
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    """Stop periodic maintenance tasks"""
+    for task in app.state.background_tasks:
+        task.cancel()
+
+
+@app.on_event("shutdown")
+async def close_database_engines():
+    """Close async and replica database connections, if any were opened"""
+    await dispose_async_engine()
+    replica_router.dispose()
+
 
 @app.get("/")
 def root():
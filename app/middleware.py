@@ -3,12 +3,12 @@ Admin middleware untuk proteksi endpoint admin-only
 """
 
 from fastapi import HTTPException, status, Depends
-from app.auth import get_current_user
-from app.models import User
+from app.auth import Identity, get_current_identity
 
-def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
+def get_admin_user(current_user: Identity = Depends(get_current_identity)) -> Identity:
     """
-    Dependency untuk memastikan user adalah admin
+    Dependency untuk memastikan user adalah admin.
+    Dengan AUTH_STATELESS_CLAIMS aktif, cukup dicek dari claim token tanpa query ke database.
     """
     if not current_user.is_admin:
         raise HTTPException(
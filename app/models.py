@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Date, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Date, Text, Boolean, Double, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -16,4 +16,83 @@ class User(Base):
     gender = Column(String(10), nullable=False)
     password = Column(String(255), nullable=False)
     is_admin = Column(Boolean, nullable=True, default=False)
-    registration_date = Column(DateTime, default=func.now())
\ No newline at end of file
+    registration_date = Column(DateTime, default=func.now())
+    # Row version: bumped by every write, exposed as the ETag of user resources
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    
+    # Keyset pagination of the admin user list: filter/sort column + id tie-breaker
+    __table_args__ = (
+        Index("ix_users_registration_date_id", "registration_date", "id"),
+        Index("ix_users_is_admin_id", "is_admin", "id"),
+        Index("ix_users_gender_id", "gender", "id"),
+    )
+    __mapper_args__ = {"version_id_col": version}
+
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # HMAC-SHA256 of the token; the raw token is only ever known to the client
+    token_hash = Column(String(64), unique=True, nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=func.now())
+
+
+class ClaimsRevocation(Base):
+    """
+    Change to a user row that other processes must see: every worker polls
+    these rows and evicts the cached principal of username. Rows with
+    revokes_claims also stop trusting token claims issued before revoked_at
+    (epoch seconds, comparable with the "iat" claim). No foreign key, so
+    deleted users stay revoked.
+    """
+    __tablename__ = "claims_revocations"
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    username = Column(String(100), nullable=True)
+    revoked_at = Column(Double, nullable=False, index=True)
+    revokes_claims = Column(Boolean, nullable=False, default=True, server_default="1")
+
+
+class Children(Base):
+    __tablename__ = "childrens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    # ON DELETE CASCADE is enforced by the database; no ORM relationship cascades
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    name = Column(String(255), nullable=False)
+    gender = Column(String(10), nullable=False)
+    dob = Column(Date, nullable=False)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    # Row version: bumped by every update (updated_at only has one-second resolution)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    
+    # A parent's children, in id order, without touching other rows
+    __table_args__ = (
+        Index("ix_childrens_user_id_id", "user_id", "id"),
+    )
+
+
+class DiagnoseHistory(Base):
+    __tablename__ = "diagnose_histories"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    children_id = Column(Integer, ForeignKey("childrens.id", ondelete="CASCADE"), nullable=False)
+    age_on_month = Column(Integer, nullable=False)
+    gender = Column(String(10), nullable=False)
+    height = Column(Float, nullable=False)
+    result = Column(String(50), nullable=False)
+    diagnosed_at = Column(DateTime, nullable=False, default=func.now())
+    # Set only by bulk inserts on databases without INSERT RETURNING (MySQL),
+    # to read exactly that batch back (see app.crud.create_diagnoses)
+    batch_token = Column(String(32), nullable=True)
+    
+    # History of one child ordered by time is a single index range scan;
+    # id breaks ties between diagnoses made in the same second (keyset cursor)
+    __table_args__ = (
+        Index("ix_diagnose_histories_children_id_diagnosed_at", "children_id", "diagnosed_at", "id"),
+    )
@@ -0,0 +1,130 @@
+"""
+Connection pool instrumentation: checkout wait histogram and connection churn
+"""
+
+import bisect
+import threading
+import time
+from typing import Optional, Type
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# Upper bounds (ms) of the checkout wait histogram buckets; last bucket is +Inf
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    """Counters fed by pool events and by the timed pool class"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._engine: Optional[Engine] = None
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+
+    def observe_wait(self, wait_ms: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.checkout_timeouts += 1
+            self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+
+    def pool_class(self) -> Type[QueuePool]:
+        """QueuePool subclass that times how long checkouts wait for a connection"""
+        metrics = self
+
+        class TimedQueuePool(QueuePool):
+            def _do_get(self):
+                started = time.perf_counter()
+                timed_out = False
+                try:
+                    return super()._do_get()
+                except PoolTimeoutError:
+                    timed_out = True
+                    raise
+                finally:
+                    metrics.observe_wait((time.perf_counter() - started) * 1000, timed_out)
+
+        return TimedQueuePool
+
+    def attach(self, engine: Engine) -> None:
+        """Listen to connection lifecycle events of ``engine``"""
+        self._engine = engine
+
+        @event.listens_for(engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            with self._lock:
+                self.connects += 1
+
+        @event.listens_for(engine, "close")
+        def on_close(dbapi_connection, connection_record):
+            with self._lock:
+                self.closes += 1
+
+        @event.listens_for(engine, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self.invalidations += 1
+
+        @event.listens_for(engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            with self._lock:
+                self.checkouts += 1
+
+    def stats(self) -> dict:
+        pool = self._engine.pool if self._engine is not None else None
+        with self._lock:
+            lower_bounds = (0,) + WAIT_BUCKETS_MS[:-1]
+            histogram = {
+                f"{lower}-{upper}ms": count
+                for lower, upper, count in zip(lower_bounds, WAIT_BUCKETS_MS, self.wait_buckets)
+            }
+            histogram[f">{WAIT_BUCKETS_MS[-1]}ms"] = self.wait_buckets[-1]
+            observed = sum(self.wait_buckets) or 1
+            result = {
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.checkout_timeouts,
+                "checkout_wait_ms": {
+                    "avg": round(self.wait_total_ms / observed, 3),
+                    "max": round(self.wait_max_ms, 3),
+                    "histogram": histogram,
+                },
+                "churn": {
+                    "connects": self.connects,
+                    "closes": self.closes,
+                    "invalidations": self.invalidations,
+                },
+            }
+        if isinstance(pool, QueuePool):
+            result.update({
+                "pool_size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "timeout": pool.timeout(),
+            })
+        elif pool is not None:
+            result["status"] = pool.status()
+        return result
+
+
+def warm_up_pool(engine: Engine, connections: int) -> int:
+    """Open up to ``connections`` connections now so the first requests do not pay for them"""
+    opened = []
+    try:
+        for _ in range(connections):
+            opened.append(engine.connect())
+    finally:
+        for connection in opened:
+            connection.close()
+    return len(opened)
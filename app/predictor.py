@@ -0,0 +1,370 @@
+"""
+Stunting predictor service: loads the trained model once per process
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import joblib
+import numpy as np
+
+from app.cache import LRUCache
+from app.config import settings
+from app.haz import TABLE_HASH, HeightForAgeClassifier
+from app.lookup_table import LookupTable
+from app.tree_kernel import TreeEnsembleKernel
+
+# Feature order used when the model does not declare feature_names_in_
+DEFAULT_FEATURES = ("age_on_month", "gender", "height")
+# Gender encoding used when the artifact does not provide "gender_mapping"
+DEFAULT_GENDER_MAPPING = {"L": 1, "P": 0}
+
+
+def file_sha256(path: str) -> str:
+    """SHA256 of the model file; identifies the model version for caches and lookup tables"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as model_file:
+        for chunk in iter(lambda: model_file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class StuntingPredictor:
+    """
+    Wraps the model stored in MODEL_CACHE_DIR/MODEL_FILE.
+
+    The file is a joblib dump (uncompressed) of either a fitted estimator or a
+    dict ``{"model": estimator, "model_name": ..., "version": ..., "accuracy": ...,
+    "gender_mapping": {"L": 1, "P": 0}}``. It is loaded with mmap_mode="r", so
+    the model's numpy arrays stay in the page cache and are shared by every
+    worker process instead of being copied into each one.
+
+    With PREDICTOR_ENGINE=numpy the model is read from the ``.npz`` written by
+    scripts/export_model_kernel.py next to MODEL_FILE and evaluated with
+    numpy only (app/tree_kernel.py). With PREDICTOR_ENGINE=who the file is
+    not read at all: categories come from the WHO height-for-age z-score
+    (app/haz.py). Neither engine imports sklearn.
+    """
+
+    def __init__(self, path: Optional[str] = None, engine: Optional[str] = None):
+        self.path = path or os.path.join(settings.MODEL_CACHE_DIR, settings.MODEL_FILE)
+        self.engine = engine or settings.PREDICTOR_ENGINE
+        self.kernel_path = os.path.splitext(self.path)[0] + ".npz"
+        self.model = None
+        self.metadata: Dict[str, Any] = {}
+        self.model_hash: Optional[str] = None
+        self.load_error: Optional[str] = None
+        self.load_ms: Optional[float] = None
+        # Precomputed answers for the whole input grid (scripts/build_lookup_table.py)
+        self.lookup_table: Optional[LookupTable] = None
+        self._gender_mapping = dict(DEFAULT_GENDER_MAPPING)
+        self._feature_order: List[str] = list(DEFAULT_FEATURES)
+        self._lock = threading.Lock()
+        # Results keyed by normalized (age_on_month, gender, height); cleared when the model changes
+        self.cache = LRUCache(max_size=settings.PREDICTION_CACHE_SIZE)
+
+    @property
+    def ready(self) -> bool:
+        return self.model is not None
+
+    def load(self) -> bool:
+        """Load the model file; returns readiness. Failures leave the service not ready."""
+        with self._lock:
+            started = time.perf_counter()
+            try:
+                if self.engine == "who":
+                    artifact, model_hash = self._who_artifact(), TABLE_HASH
+                elif self.engine == "numpy":
+                    kernel = TreeEnsembleKernel.load(self.kernel_path)
+                    # Same predictions as the exported file, so it keeps that file's hash
+                    artifact = {**kernel.metadata, "model": kernel}
+                    model_hash = kernel.metadata["model_hash"]
+                else:
+                    artifact = joblib.load(self.path, mmap_mode="r")
+                    model_hash = file_sha256(self.path)
+            except Exception as e:
+                self.model = None
+                self.load_error = str(e)
+                return False
+
+            metadata = {}
+            if isinstance(artifact, dict):
+                metadata = {key: value for key, value in artifact.items() if key not in ("model", "model_hash")}
+                artifact = artifact["model"]
+
+            self.metadata = metadata
+            self._gender_mapping = dict(metadata.get("gender_mapping", DEFAULT_GENDER_MAPPING))
+            feature_names = getattr(artifact, "feature_names_in_", None)
+            if feature_names is not None:
+                self._feature_order = [str(name) for name in feature_names]
+            else:
+                self._feature_order = list(DEFAULT_FEATURES)
+            if model_hash != self.model_hash:
+                self.cache.clear()
+            self.model_hash = model_hash
+            self.model = artifact
+            self.lookup_table = self._open_lookup_table()
+            self.load_error = None
+            self.load_ms = (time.perf_counter() - started) * 1000
+            return True
+
+    def _open_lookup_table(self) -> Optional[LookupTable]:
+        if not settings.PREDICTION_LOOKUP_TABLE:
+            return None
+        try:
+            return LookupTable.open(self.path, self.model_hash)
+        except Exception as e:
+            # The live model still answers everything
+            print(f"⚠️  Prediction lookup table not loaded: {e}")
+            return None
+
+    @staticmethod
+    def _who_artifact() -> Dict[str, Any]:
+        return {
+            "model": HeightForAgeClassifier(DEFAULT_GENDER_MAPPING),
+            "model_name": HeightForAgeClassifier.model_name,
+            "version": "WHO 2006",
+            "algorithm": HeightForAgeClassifier.algorithm,
+            "gender_mapping": DEFAULT_GENDER_MAPPING,
+        }
+
+    def features(self, age_on_month: int, gender: str, height: float) -> List[float]:
+        """Model input row in the model's feature order"""
+        values = {
+            "age_on_month": float(age_on_month),
+            "gender": float(self._gender_mapping[gender]),
+            "height": float(height),
+        }
+        return [values[name] for name in self._feature_order]
+
+    @staticmethod
+    def cache_key(age_on_month: int, gender: str, height: float) -> tuple:
+        """Normalized input: heights are measured to 0.1 cm, so they are rounded to it"""
+        return int(age_on_month), gender, round(float(height), 1)
+
+    def predict(self, age_on_month: int, gender: str, height: float) -> str:
+        """Stunting category for one measurement"""
+        return self.predict_many([(age_on_month, gender, height)])[0]
+
+    def predict_many(self, measurements: List[tuple]) -> List[str]:
+        """
+        Stunting categories for (age_on_month, gender, height) tuples.
+        The lookup table and cached results are used first; the rest go to
+        the model in one call.
+        """
+        if not self.ready:
+            raise RuntimeError("Stunting predictor is not initialized or trained")
+        keys = [self.cache_key(*measurement) for measurement in measurements]
+        results = self.lookup(keys)
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            labels = self.predict_keys([keys[index] for index in missing])
+            for index, label in zip(missing, labels):
+                results[index] = label
+        return results
+
+    def lookup(self, keys: List[tuple]) -> List[Optional[str]]:
+        """Answers that need no model call (None elsewhere): lookup table, then the cache"""
+        if self.lookup_table is not None:
+            results = self.lookup_table.labels(keys)
+        else:
+            results = [None] * len(keys)
+        return [result if result is not None else self.cache.get(key) for key, result in zip(keys, results)]
+
+    def predict_keys(self, keys: List[tuple]) -> List[str]:
+        """Run the model once on normalized inputs (see cache_key) and cache the results"""
+        labels = self._predict_uncached(keys)
+        for key, label in zip(keys, labels):
+            self.cache.set(key, label)
+        return labels
+
+    def _predict_uncached(self, measurements: List[tuple]) -> List[str]:
+        rows = np.array([self.features(*measurement) for measurement in measurements], dtype=np.float64)
+        return [str(label) for label in self.model.predict(rows)]
+
+    def cache_status(self) -> Dict[str, Any]:
+        stats = self.cache.stats()
+        return {
+            "total_cached": stats["size"],
+            "cache_hits": stats["hits"],
+            "cache_misses": stats["misses"],
+            "evictions": stats["evictions"],
+            "max_size": stats["max_size"],
+        }
+
+    def model_info(self) -> Dict[str, Any]:
+        classes = getattr(self.model, "classes_", None)
+        return {
+            "model_name": self.metadata.get("model_name", type(self.model).__name__),
+            "version": str(self.metadata.get("version", self.model_hash[:12])),
+            "accuracy": self.metadata.get("accuracy"),
+            "algorithm": self.metadata.get("algorithm", type(self.model).__name__),
+            "available_classes": [str(label) for label in classes] if classes is not None else [],
+            "model_hash": self.model_hash,
+        }
+
+    def status(self) -> Dict[str, Any]:
+        """Body of GET /api/children/predictor/status"""
+        if not self.ready:
+            return {
+                "status": "not_ready",
+                "message": "Stunting predictor is not initialized or trained",
+            }
+        return {
+            "status": "ready",
+            "model_info": self.model_info(),
+            "cache_status": self.cache_status(),
+            "lookup_table": self.lookup_table.status() if self.lookup_table is not None else None,
+        }
+
+
+class PredictionBatcher:
+    """
+    Micro-batcher for single predictions coming from concurrent requests.
+
+    A cache (and lookup table) miss waits at most ``window_ms`` (or until ``max_batch_size``
+    misses are queued); the whole batch is then stacked into one numpy array
+    and scored with a single ``model.predict`` call on a dedicated thread, so
+    sklearn's per-call overhead is paid once per batch instead of once per
+    request. Results are fanned back out to the waiting futures.
+    """
+
+    def __init__(self, predictor: StuntingPredictor, window_ms: float, max_batch_size: int):
+        self.predictor = predictor
+        self.window = max(window_ms, 0) / 1000
+        self.max_batch_size = max(max_batch_size, 1)
+        self._queue: List[tuple] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: set = set()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._predictions = 0
+        self._failed = 0
+        self._max_size = 0
+        self._size_histogram: Dict[int, int] = {}
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_run = 0.0
+        self._max_run = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # One thread: model calls never overlap, the next batch fills up meanwhile
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="predict")
+            return self._executor
+
+    async def predict(self, age_on_month: int, gender: str, height: float) -> str:
+        """Stunting category for one measurement, scored together with concurrent requests"""
+        if not self.predictor.ready:
+            raise RuntimeError("Stunting predictor is not initialized or trained")
+        key = self.predictor.cache_key(age_on_month, gender, height)
+        known = self.predictor.lookup([key])[0]
+        if known is not None:
+            return known
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((key, future, time.perf_counter()))
+        if len(self._queue) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._queue = self._queue, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[tuple]) -> None:
+        # Identical inputs in one batch are scored once
+        keys = list(dict.fromkeys(key for key, _, _ in batch))
+
+        def job():
+            started_at = time.perf_counter()
+            return self.predictor.predict_keys(keys), started_at, time.perf_counter() - started_at
+
+        try:
+            loop = asyncio.get_running_loop()
+            labels, started_at, run = await loop.run_in_executor(self._get_executor(), job)
+        except Exception as e:
+            with self._lock:
+                self._failed += len(batch)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        results = dict(zip(keys, labels))
+        for key, future, _ in batch:
+            # Done already when the waiting request was cancelled
+            if not future.done():
+                future.set_result(results[key])
+        self._record(len(batch), [started_at - enqueued_at for _, _, enqueued_at in batch], run)
+
+    def _record(self, size: int, waits: List[float], run: float) -> None:
+        bucket = 1 << (size - 1).bit_length()
+        with self._lock:
+            self._batches += 1
+            self._predictions += size
+            self._max_size = max(self._max_size, size)
+            self._size_histogram[bucket] = self._size_histogram.get(bucket, 0) + 1
+            self._total_wait += sum(waits)
+            self._max_wait = max(self._max_wait, max(waits))
+            self._total_run += run
+            self._max_run = max(self._max_run, run)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch size and queue wait counters; table and cache hits never reach the batcher"""
+        with self._lock:
+            batches = self._batches or 1
+            predictions = self._predictions or 1
+            return {
+                "window_ms": self.window * 1000,
+                "max_batch_size": self.max_batch_size,
+                "queued": len(self._queue),
+                "batches": self._batches,
+                "predictions": self._predictions,
+                "failed": self._failed,
+                "avg_batch_size": round(self._predictions / batches, 2),
+                "largest_batch": self._max_size,
+                # Number of batches per size bucket: "<=1", "<=2", "<=4", ...
+                "batch_size_histogram": {
+                    f"<={bucket}": count for bucket, count in sorted(self._size_histogram.items())
+                },
+                "avg_queue_wait_ms": round(self._total_wait / predictions * 1000, 3),
+                "max_queue_wait_ms": round(self._max_wait * 1000, 3),
+                "avg_run_ms": round(self._total_run / batches * 1000, 3),
+                "max_run_ms": round(self._max_run * 1000, 3),
+            }
+
+    def shutdown(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+stunting_predictor = StuntingPredictor()
+
+# Global batcher used by POST /api/children/{children_id}/diagnose
+prediction_batcher = PredictionBatcher(
+    stunting_predictor,
+    window_ms=settings.PREDICTION_BATCH_WINDOW_MS,
+    max_batch_size=settings.PREDICTION_BATCH_SIZE,
+)
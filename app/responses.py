@@ -0,0 +1,43 @@
+"""
+JSON response helpers: configurable default response class and direct
+pydantic-core serialization for large list responses
+"""
+
+from typing import Any, Iterable, Optional, Type
+
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from pydantic import TypeAdapter
+
+from app.config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def get_default_response_class() -> Type[JSONResponse]:
+    """Response class for JSON_RESPONSE_CLASS ("orjson" falls back to "json" when orjson is missing)"""
+    if settings.JSON_RESPONSE_CLASS == "orjson":
+        if orjson is not None:
+            return ORJSONResponse
+        print("⚠️  orjson is not installed, using the standard JSON response class")
+    return JSONResponse
+
+
+def serialize_list(adapter: TypeAdapter, items: Iterable[Any]) -> bytes:
+    """
+    Validate ORM objects/rows against ``adapter`` and dump them straight to
+    JSON bytes, both inside pydantic-core (no intermediate dicts, no
+    jsonable_encoder).
+    """
+    return adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+
+
+def list_response(adapter: TypeAdapter, items: Iterable[Any], headers: Optional[dict] = None) -> Response:
+    """JSON response of a list serialized by serialize_list()"""
+    return Response(
+        content=serialize_list(adapter, items),
+        media_type="application/json",
+        headers=headers,
+    )
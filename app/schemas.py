@@ -1,8 +1,21 @@
-from pydantic import BaseModel, validator
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints
+from typing import Annotated, List, Literal, Optional
 from datetime import date, datetime
 
 
+# Constrained strings, validated inside pydantic-core (no Python validators)
+TrimmedStr = Annotated[str, StringConstraints(strip_whitespace=True)]
+# Passwords: at least 6 characters after trimming
+Password = Annotated[str, StringConstraints(strip_whitespace=True, min_length=6)]
+# New password on change-password is not trimmed (as before)
+NewPassword = Annotated[str, StringConstraints(min_length=6)]
+# Children and diagnose inputs
+ChildName = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
+Gender = Literal["L", "P"]
+AgeOnMonth = Annotated[int, Field(ge=0, le=60)]
+Height = Annotated[float, Field(ge=30, le=200)]
+
+
 # Base schemas
 class UserBase(BaseModel):
     avatar_type: int
@@ -16,57 +29,36 @@ class UserBase(BaseModel):
 
 # Create schemas
 class UserCreate(UserBase):
-    password: str
-    
-    @validator('username', 'name', 'address', 'password')
-    def trim_strings(cls, v):
-        if isinstance(v, str):
-            return v.strip()
-        return v
-    
-    @validator('password')
-    def validate_password(cls, v):
-        if len(v) < 6:
-            raise ValueError('Password must be at least 6 characters')
-        return v
+    name: TrimmedStr
+    username: TrimmedStr
+    address: Optional[TrimmedStr] = None
+    password: Password
 
 
 # Update schemas
 class UserUpdate(BaseModel):
     avatar_type: Optional[int] = None
-    name: Optional[str] = None
-    username: Optional[str] = None
-    address: Optional[str] = None
+    name: Optional[TrimmedStr] = None
+    username: Optional[TrimmedStr] = None
+    address: Optional[TrimmedStr] = None
     dob: Optional[date] = None
     gender: Optional[str] = None
     is_admin: Optional[bool] = None
-    
-    @validator('name', 'username', 'address')
-    def trim_strings(cls, v):
-        if isinstance(v, str):
-            return v.strip()
-        return v
 
 
 # Response schemas
 class UserResponse(UserBase):
     id: int
-    registration_date: datetime
+    # Nullable column; such users are listed after all others
+    registration_date: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Auth schemas
 class UserLogin(BaseModel):
-    username: str
-    password: str
-    
-    @validator('username', 'password')
-    def trim_strings(cls, v):
-        if isinstance(v, str):
-            return v.strip()
-        return v
+    username: TrimmedStr
+    password: TrimmedStr
 
 
 class UserRegister(UserCreate):
@@ -81,18 +73,85 @@ class Token(BaseModel):
 class LoginResponse(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: str
     user: UserResponse
 
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class RefreshResponse(BaseModel):
+    access_token: str
+    token_type: str
+    refresh_token: str
+
+
 class TokenData(BaseModel):
     username: Optional[str] = None
+    user_id: Optional[int] = None
+    is_admin: Optional[bool] = None
+    issued_at: Optional[int] = None
 
 
 class PasswordChange(BaseModel):
-    new_password: str
+    new_password: NewPassword
+
+
+# Children schemas
+class ChildrenBase(BaseModel):
+    name: ChildName
+    gender: Gender
+    dob: date
+
+
+class ChildrenCreate(ChildrenBase):
+    pass
+
+
+class ChildrenUpdate(BaseModel):
+    name: Optional[ChildName] = None
+    gender: Optional[Gender] = None
+    dob: Optional[date] = None
+
+
+class ChildrenResponse(ChildrenBase):
+    id: int
+    user_id: int
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Diagnose schemas
+class DiagnoseRequest(BaseModel):
+    age_on_month: AgeOnMonth
+    gender: Gender
+    height: Height
+
+
+class DiagnoseResponse(DiagnoseRequest):
+    id: int
+    result: str
+    children_id: int
+    diagnosed_at: datetime
     
-    @validator('new_password')
-    def validate_password(cls, v):
-        if len(v) < 6:
-            raise ValueError('Password must be at least 6 characters')
-        return v
+    model_config = ConfigDict(from_attributes=True)
+
+
+class DiagnoseBatchItem(DiagnoseRequest):
+    children_id: int
+
+
+class DiagnoseBatchResult(BaseModel):
+    index: int
+    children_id: Optional[int] = None
+    diagnose: Optional[DiagnoseResponse] = None
+    error: Optional[str] = None
+
+
+class DiagnoseBatchResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[DiagnoseBatchResult]
@@ -0,0 +1,131 @@
+"""
+Per-request SQL instrumentation: query count/time headers, N+1 detection
+and a sampled slow-query log with redacted parameters
+"""
+
+import random
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from app.config import settings
+
+# Placeholder lists such as "IN (?, ?, ?)" or "VALUES (%s, %s)" collapse to one shape
+_PLACEHOLDER_LIST_RE = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize statement text so repeated executions of one query compare equal"""
+    shape = _PLACEHOLDER_LIST_RE.sub("(?)", statement)
+    return _WHITESPACE_RE.sub(" ", shape).strip()
+
+
+def redact_parameters(parameters) -> str:
+    """Describe bound parameters by type only, never by value"""
+    if parameters is None:
+        return "none"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: <{type(value).__name__}>" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (list, tuple, dict)):
+            return f"<{len(parameters)} parameter sets>"
+        return "(" + ", ".join(f"<{type(value).__name__}>" for value in parameters) + ")"
+    return f"<{type(parameters).__name__}>"
+
+
+class RequestQueryStats:
+    """SQL statements executed while serving one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.shapes: Counter = Counter()
+        self.n_plus_one: set = set()
+
+    def record(self, statement: str, elapsed_ms: float) -> Optional[str]:
+        """Count statement; returns its shape when it just crossed the N+1 threshold"""
+        self.count += 1
+        self.total_ms += elapsed_ms
+        shape = statement_shape(statement)
+        self.shapes[shape] += 1
+        if self.shapes[shape] == settings.SQL_N_PLUS_ONE_THRESHOLD + 1:
+            self.n_plus_one.add(shape)
+            return shape
+        return None
+
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach timing hooks to a (sync) engine; use ``async_engine.sync_engine`` for async ones"""
+
+    # The start time lives on the per-statement execution context, so a
+    # statement that raises (no after_cursor_execute) leaves nothing behind
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_started_at = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_query_started_at", None)
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        stats = _current_stats.get()
+        if stats is not None:
+            shape = stats.record(statement, elapsed_ms)
+            if shape is not None:
+                print(
+                    f"⚠️  Possible N+1: statement ran more than "
+                    f"{settings.SQL_N_PLUS_ONE_THRESHOLD} times in one request: {shape[:500]}"
+                )
+
+        if elapsed_ms >= settings.SQL_SLOW_QUERY_MS and random.random() < settings.SQL_SLOW_QUERY_SAMPLE_RATE:
+            print(
+                f"🐢 Slow query ({elapsed_ms:.1f} ms): {statement_shape(statement)[:500]} "
+                f"| params: {redact_parameters(parameters)}"
+            )
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware collecting per-request query stats (for N+1 warnings);
+    with expose_headers also adds X-DB-Query-Count / X-DB-Time-Ms to every response
+    """
+
+    def __init__(self, app, expose_headers: bool = True):
+        self.app = app
+        self.expose_headers = expose_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start" and self.expose_headers:
+                headers = MutableHeaders(scope=message)
+                headers.append("X-DB-Query-Count", str(stats.count))
+                headers.append("X-DB-Time-Ms", f"{stats.total_ms:.2f}")
+                if stats.n_plus_one:
+                    headers.append("X-DB-N-Plus-One", str(len(stats.n_plus_one)))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current_stats.reset(token)
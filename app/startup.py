@@ -0,0 +1,84 @@
+"""
+Startup helpers: Alembic revision check and startup time budget
+"""
+
+import re
+import time
+from pathlib import Path
+from typing import List, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "alembic" / "versions"
+
+_REVISION_RE = re.compile(r"^revision\s*=\s*['\"](\w+)['\"]", re.MULTILINE)
+_DOWN_REVISION_RE = re.compile(r"^down_revision\s*=\s*['\"](\w+)['\"]", re.MULTILINE)
+
+# Result of check_schema_revision(), computed once per process
+_schema_status: Optional[dict] = None
+
+
+def get_head_revisions(migrations_dir: Path = MIGRATIONS_DIR) -> Set[str]:
+    """
+    Head revision(s) of the migration scripts.
+    Parsed directly from the files: the project's own ``alembic`` package
+    shadows the alembic library on sys.path, and reading a handful of small
+    files is cheaper than loading Alembic's script machinery anyway.
+    """
+    revisions, down_revisions = set(), set()
+    for path in migrations_dir.glob("*.py"):
+        source = path.read_text(encoding="utf-8")
+        revision = _REVISION_RE.search(source)
+        if revision:
+            revisions.add(revision.group(1))
+        down_revision = _DOWN_REVISION_RE.search(source)
+        if down_revision:
+            down_revisions.add(down_revision.group(1))
+    return revisions - down_revisions
+
+
+def check_schema_revision(engine: Engine) -> dict:
+    """Compare the database's Alembic revision with the code's head (one query, cached)"""
+    global _schema_status
+
+    if _schema_status is None:
+        heads = get_head_revisions()
+        with engine.connect() as connection:
+            current = connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+        _schema_status = {
+            "current": current,
+            "head": sorted(heads),
+            "up_to_date": current in heads,
+        }
+    return _schema_status
+
+
+class StartupTimer:
+    """Wall-clock phases from process import until the app is ready to serve"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases: List[tuple] = []
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self._last) * 1000))
+        self._last = now
+
+    @property
+    def total_ms(self) -> float:
+        return (self._last - self.started) * 1000
+
+    def report(self, budget_ms: int) -> bool:
+        """Print phase breakdown; returns False when the budget was exceeded"""
+        within_budget = self.total_ms <= budget_ms
+        icon = "⏱️ " if within_budget else "⚠️ "
+        print(f"{icon} Startup took {self.total_ms:.0f} ms (budget {budget_ms} ms)")
+        for phase, elapsed_ms in self.phases:
+            print(f"   {phase}: {elapsed_ms:.0f} ms")
+        return within_budget
+
+
+startup_timer = StartupTimer()
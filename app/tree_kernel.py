@@ -0,0 +1,155 @@
+"""
+Pure-numpy evaluator for exported decision tree / random forest classifiers
+
+``export_tree_model`` flattens a fitted sklearn tree or forest into a few
+numpy arrays (split feature, threshold, left/right child, leaf values) and
+saves them as an ``.npz``. ``TreeEnsembleKernel`` walks all trees for all rows
+at once with array indexing, so workers can predict without importing
+scikit-learn (or pandas).
+
+The evaluator reproduces sklearn's arithmetic exactly: inputs are cast to
+float32 before comparing with the float64 thresholds, per-tree probabilities
+are normalized the way the exporting sklearn version did it, and forest
+probabilities are summed in estimator order before dividing by the number of
+trees. Predictions and probabilities are therefore bit-for-bit identical
+(tests/test_tree_kernel.py).
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+KERNEL_FORMAT = 1
+FOREST = "forest"
+TREE = "tree"
+
+
+def _sklearn_normalizes_leaf_values() -> bool:
+    """sklearn < 1.4 stores class counts in tree_.value and normalizes them in predict_proba"""
+    import sklearn
+
+    major, minor = (int(part) for part in sklearn.__version__.split(".")[:2])
+    return (major, minor) < (1, 4)
+
+
+def export_tree_model(model, path: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Write a fitted DecisionTreeClassifier / ExtraTreeClassifier or
+    RandomForestClassifier / ExtraTreesClassifier to ``path`` (.npz).
+    ``metadata`` (JSON-serializable) is stored alongside the arrays.
+    """
+    from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+    from sklearn.tree import DecisionTreeClassifier
+
+    if isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+        kind, estimators = FOREST, list(model.estimators_)
+    elif isinstance(model, DecisionTreeClassifier):
+        kind, estimators = TREE, [model]
+    else:
+        raise ValueError(f"Unsupported model type: {type(model).__name__}")
+    if model.n_outputs_ != 1:
+        raise ValueError("Only single-output classifiers can be exported")
+
+    n_classes = len(model.classes_)
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    for estimator in estimators:
+        tree = estimator.tree_
+        is_leaf = tree.children_left == -1
+        node_ids = np.arange(tree.node_count)
+        roots.append(offset)
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+        # Leaves point at themselves, so extra traversal steps keep them in place
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+        rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+        values.append(tree.value[:, 0, :n_classes])
+        offset += tree.node_count
+
+    arrays = {
+        "feature": np.concatenate(features).astype(np.intp),
+        "threshold": np.concatenate(thresholds).astype(np.float64),
+        "children_left": np.concatenate(lefts).astype(np.intp),
+        "children_right": np.concatenate(rights).astype(np.intp),
+        "value": np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+        "roots": np.array(roots, dtype=np.intp),
+        "classes": np.array([str(label) for label in model.classes_]),
+    }
+    feature_names = getattr(model, "feature_names_in_", None)
+    header = {
+        "format": KERNEL_FORMAT,
+        "kind": kind,
+        "n_features": int(model.n_features_in_),
+        "max_depth": max(int(estimator.tree_.max_depth) for estimator in estimators),
+        "normalize": _sklearn_normalizes_leaf_values(),
+        "feature_names": [str(name) for name in feature_names] if feature_names is not None else None,
+        "metadata": metadata or {},
+    }
+    np.savez(path, header=np.array(json.dumps(header)), **arrays)
+
+
+class TreeEnsembleKernel:
+    """Exported tree model; ``predict`` / ``predict_proba`` like the sklearn estimator"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], header: Dict[str, Any]):
+        if header.get("format") != KERNEL_FORMAT:
+            raise ValueError(f"Unsupported kernel format: {header.get('format')}")
+        self.kind = header["kind"]
+        self.n_features_in_ = header["n_features"]
+        self.max_depth = header["max_depth"]
+        self.normalize = header["normalize"]
+        self.metadata = header["metadata"]
+        if header["feature_names"] is not None:
+            self.feature_names_in_ = np.array(header["feature_names"], dtype=object)
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.children_left = arrays["children_left"]
+        self.children_right = arrays["children_right"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.classes_ = arrays["classes"].astype(object)
+
+    @classmethod
+    def load(cls, path: str) -> "TreeEnsembleKernel":
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files if name != "header"}
+            header = json.loads(str(data["header"]))
+        return cls(arrays, header)
+
+    def apply(self, X) -> np.ndarray:
+        """Leaf node of every row in every tree, shape (n_samples, n_trees)"""
+        # sklearn validates X to float32 and compares it with float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected input of shape (n_samples, {self.n_features_in_})")
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        nodes = np.repeat(self.roots[np.newaxis, :], X.shape[0], axis=0)
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.children_left[nodes], self.children_right[nodes])
+        return nodes
+
+    def _tree_proba(self, leaves: np.ndarray) -> np.ndarray:
+        proba = self.value[leaves]
+        if self.normalize:
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            proba /= normalizer
+        return proba
+
+    def predict_proba(self, X) -> np.ndarray:
+        leaves = self.apply(X)
+        if self.kind == TREE:
+            return self._tree_proba(leaves[:, 0])
+        proba = np.zeros((leaves.shape[0], len(self.classes_)), dtype=np.float64)
+        for tree in range(leaves.shape[1]):
+            proba += self._tree_proba(leaves[:, tree])
+        proba /= leaves.shape[1]
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        if self.kind == TREE:
+            # DecisionTreeClassifier.predict takes argmax of the raw leaf values
+            return self.classes_.take(np.argmax(self.value[self.apply(X)[:, 0]], axis=1), axis=0)
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
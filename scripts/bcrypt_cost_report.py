@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Script untuk melihat distribusi bcrypt cost factor di tabel users
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func
+from app.auth import configure_bcrypt_rounds
+from app.config import settings
+from app.database import SessionLocal
+from app.models import User
+
+
+def main():
+    """Print hash cost distribution against the cost this machine would use (calibrate once, then pin it)"""
+    target = configure_bcrypt_rounds()
+    
+    db = SessionLocal()
+    try:
+        # "$2b$12$..." -> characters 5-6 hold the cost factor
+        cost = func.substr(User.password, 5, 2)
+        rows = db.query(cost, func.count(User.id)).group_by(cost).order_by(cost).all()
+    finally:
+        db.close()
+    
+    total = sum(count for _, count in rows)
+    print("🔐 Bcrypt Cost Distribution")
+    print("=" * 50)
+    print(f"   Target cost on this machine: {target}")
+    print(f"   Total users: {total}")
+    for value, count in rows:
+        share = count / total * 100 if total else 0
+        marker = "  (rehash on next login)" if value.isdigit() and int(value) < target else ""
+        print(f"   cost {value}: {count:>8} ({share:5.1f}%){marker}")
+    if not settings.BCRYPT_ROUNDS:
+        # Calibrated per worker; pinning one value keeps every worker on the same cost
+        print(f"\n💡 Pin this cost for all workers with BCRYPT_ROUNDS={target}")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
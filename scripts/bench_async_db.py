@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark sync (threadpool) vs async database access on the same hardware
+
+Each simulated request looks up one user by username, the same query every
+authenticated endpoint used to make. The sync path mirrors how FastAPI runs
+plain ``def`` handlers: a blocking Session on a threadpool limited to 40
+threads. The async path mirrors ``async def`` handlers on get_async_db.
+
+Usage:
+    python scripts/bench_async_db.py [requests] [concurrency]
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import anyio
+from app import crud, crud_async
+from app.database import SessionLocal, dispose_async_engine, get_async_db
+from app.models import User
+
+# Starlette's default threadpool size for sync endpoints
+THREADPOOL_SIZE = 40
+
+
+def _sync_lookup(username: str) -> None:
+    db = SessionLocal()
+    try:
+        crud.get_user_by_username(db, username)
+    finally:
+        db.close()
+
+
+async def _async_lookup(username: str) -> None:
+    async for db in get_async_db():
+        await crud_async.get_user_by_username(db, username)
+
+
+async def _run(name, call, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await call()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"   {name:<6} {total / elapsed:>10.1f} req/s"
+          f"   p50 {statistics.median(latencies):>7.2f} ms"
+          f"   p95 {latencies[int(len(latencies) * 0.95) - 1]:>7.2f} ms")
+
+
+async def main(total: int, concurrency: int):
+    db = SessionLocal()
+    try:
+        user = db.query(User.username).first()
+    finally:
+        db.close()
+    if user is None:
+        print("❌ Users table is empty, register at least one user first")
+        return False
+
+    limiter = anyio.CapacityLimiter(THREADPOOL_SIZE)
+
+    async def sync_call():
+        await anyio.to_thread.run_sync(_sync_lookup, user.username, limiter=limiter)
+
+    async def async_call():
+        await _async_lookup(user.username)
+
+    print("🏁 Sync vs Async Database Benchmark")
+    print("=" * 50)
+    print(f"   Requests: {total}, concurrency: {concurrency}, threadpool: {THREADPOOL_SIZE}")
+    # Warm up both connection pools before measuring
+    await _run("warmup", sync_call, concurrency, concurrency)
+    await _run("warmup", async_call, concurrency, concurrency)
+    print("-" * 50)
+    await _run("sync", sync_call, total, concurrency)
+    await _run("async", async_call, total, concurrency)
+
+    await dispose_async_engine()
+    return True
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    success = asyncio.run(main(total, concurrency))
+    sys.exit(0 if success else 1)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Validation microbenchmark and parity check for app/schemas.py
+
+The request schemas used to trim and check strings with v1-style
+``@validator`` hooks (Python code on every field); they now use
+``StringConstraints`` that run inside pydantic-core. This script keeps a
+copy of the old validators and checks that both versions accept and reject
+the same inputs, and produce the same values, before timing them.
+
+Known difference: Python's str.strip() also strips the ASCII separators
+\\x1c-\\x1f, pydantic-core does not. They cannot be typed on the app's
+keyboards; they are listed but do not fail the check.
+
+Usage:
+    python scripts/bench_schema_validation.py [iterations]
+"""
+
+import os
+import sys
+import time
+import warnings
+from datetime import date
+from typing import Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import BaseModel, ValidationError
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+    from pydantic import validator
+
+from app import schemas
+
+KNOWN_DIFFERENCES = "\x1c\x1d\x1e\x1f"
+
+
+# Schemas as they were before the migration
+class LegacyUserBase(BaseModel):
+    avatar_type: int
+    name: str
+    username: str
+    address: Optional[str] = None
+    dob: date
+    gender: str
+    is_admin: Optional[bool] = False
+
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+
+    class LegacyUserCreate(LegacyUserBase):
+        password: str
+
+        @validator('username', 'name', 'address', 'password')
+        def trim_strings(cls, v):
+            if isinstance(v, str):
+                return v.strip()
+            return v
+
+        @validator('password')
+        def validate_password(cls, v):
+            if len(v) < 6:
+                raise ValueError('Password must be at least 6 characters')
+            return v
+
+    class LegacyUserUpdate(BaseModel):
+        avatar_type: Optional[int] = None
+        name: Optional[str] = None
+        username: Optional[str] = None
+        address: Optional[str] = None
+        dob: Optional[date] = None
+        gender: Optional[str] = None
+        is_admin: Optional[bool] = None
+
+        @validator('name', 'username', 'address')
+        def trim_strings(cls, v):
+            if isinstance(v, str):
+                return v.strip()
+            return v
+
+    class LegacyUserLogin(BaseModel):
+        username: str
+        password: str
+
+        @validator('username', 'password')
+        def trim_strings(cls, v):
+            if isinstance(v, str):
+                return v.strip()
+            return v
+
+    class LegacyPasswordChange(BaseModel):
+        new_password: str
+
+        @validator('new_password')
+        def validate_password(cls, v):
+            if len(v) < 6:
+                raise ValueError('Password must be at least 6 characters')
+            return v
+
+
+PAIRS = {
+    "UserCreate": (LegacyUserCreate, schemas.UserCreate),
+    "UserUpdate": (LegacyUserUpdate, schemas.UserUpdate),
+    "UserLogin": (LegacyUserLogin, schemas.UserLogin),
+    "PasswordChange": (LegacyPasswordChange, schemas.PasswordChange),
+}
+
+# Values tried for every string field; whitespace from keyboards and copy/paste
+STRING_SAMPLES = [
+    "budi", "  budi  ", "\tbudi\n", "", " ", "      ", "abcde", "abcdef", " abcde ",
+    "  abcdef", "abc def", " secret ", "　secret1", "secret ",
+    "\x0bsecr\x0c", "\r\nsecret\r\n", "\x85pass12", "rahasia🔒", "pässwörd",
+    "a" * 72, "a" * 300, "\x1fsecret", "abcde\x1c",
+    None, 123456, True, ["secret1"],
+]
+
+
+STRING_FIELDS = {
+    "UserCreate": ["name", "username", "address", "password"],
+    "UserUpdate": ["name", "username", "address"],
+    "UserLogin": ["username", "password"],
+    "PasswordChange": ["new_password"],
+}
+
+
+def payloads(name: str):
+    """Valid base payload with each string field replaced by every sample"""
+    base = {
+        "UserCreate": {"avatar_type": 1, "name": "Ibu Sari", "username": "sari",
+                       "dob": "1990-01-01", "gender": "P", "password": "secret1"},
+        "UserUpdate": {"name": "Ibu Sari"},
+        "UserLogin": {"username": "sari", "password": "secret1"},
+        "PasswordChange": {"new_password": "secret12"},
+    }[name]
+    fields = STRING_FIELDS[name]
+    yield dict(base)
+    for field in fields:
+        for sample in STRING_SAMPLES:
+            yield {**base, field: sample}
+    yield {key: value for key, value in base.items() if key != fields[-1]}
+
+
+def outcome(model, payload):
+    try:
+        return True, model(**payload).model_dump()
+    except ValidationError:
+        return False, None
+
+
+def check_parity() -> bool:
+    ok = True
+    for name, (legacy, current) in PAIRS.items():
+        checked = known = 0
+        for payload in payloads(name):
+            checked += 1
+            before, after = outcome(legacy, payload), outcome(current, payload)
+            if before == after:
+                continue
+            if any(isinstance(value, str) and set(value) & set(KNOWN_DIFFERENCES) for value in payload.values()):
+                known += 1
+                continue
+            ok = False
+            print(f"   ❌ {name} {payload!r}: before {before}, after {after}")
+        print(f"   {'✅' if ok else '❌'} {name}: {checked} inputs, {known} known \\x1c-\\x1f differences")
+    return ok
+
+
+def bench(iterations: int) -> None:
+    print(f"\n⏱️  {iterations} validations per schema")
+    for name, (legacy, current) in PAIRS.items():
+        # Padded values so the trimming path is exercised
+        payload = {key: f"  {value}  " if key in STRING_FIELDS[name] else value
+                   for key, value in next(payloads(name)).items()}
+        timings = []
+        for model in (legacy, current):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                model(**payload)
+            timings.append((time.perf_counter() - started) / iterations * 1e6)
+        print(f"   {name:<15} validators {timings[0]:>6.2f} µs   constraints {timings[1]:>6.2f} µs"
+              f"   ({timings[0] / timings[1]:.1f}x)")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print("🔍 Accepted/rejected parity with the previous validators")
+    if not check_parity():
+        sys.exit(1)
+    bench(iterations)
+
+
+if __name__ == "__main__":
+    main()
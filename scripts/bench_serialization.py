@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark serialization of the admin user list
+
+Compares, on 1k / 10k / 100k in-memory ``User`` rows:
+  default  - what FastAPI does for ``response_model=List[UserResponse]``:
+             validate into models, serialize to Python objects, then
+             ``json.dumps`` in JSONResponse
+  orjson   - same, rendered by ORJSONResponse (JSON_RESPONSE_CLASS=orjson)
+  adapter  - app.responses.serialize_list: TypeAdapter validate + dump_json,
+             entirely inside pydantic-core (used by GET /api/users/)
+
+Latency is the best of ``repeat`` runs; peak memory is measured with
+tracemalloc on a separate run (tracemalloc slows everything down).
+
+Usage:
+    python scripts/bench_serialization.py [sizes] [repeat]
+    python scripts/bench_serialization.py 1000,10000,100000 3
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi._compat import ModelField
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.utils import create_response_field
+from pydantic import TypeAdapter
+
+from app.models import User
+from app.responses import serialize_list
+from app.schemas import UserResponse
+
+USER_LIST_ADAPTER = TypeAdapter(List[UserResponse])
+
+
+def make_users(count: int) -> List[User]:
+    """Transient User rows shaped like real registrations"""
+    registered = datetime(2024, 1, 1)
+    return [
+        User(
+            id=i,
+            avatar_type=i % 4 + 1,
+            name=f"Orang Tua {i}",
+            username=f"parent{i:06d}",
+            address=f"Jl. Merdeka No. {i}, Kota Contoh",
+            dob=date(1990, 1, 1) + timedelta(days=i % 3650),
+            gender="L" if i % 2 else "P",
+            password="$2b$12$" + "x" * 53,
+            is_admin=False,
+            registration_date=registered + timedelta(minutes=i),
+            version=1,
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def fastapi_path(field: ModelField, response_class):
+    def render(users):
+        value, errors = field.validate(users, {}, loc=("response",))
+        assert not errors, errors
+        return response_class(field.serialize(value, mode="json")).body
+    return render
+
+
+def adapter_path(users):
+    return serialize_list(USER_LIST_ADAPTER, users)
+
+
+def measure(render, users, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = render(users)
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    render(users)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best * 1000, peak / (1024 * 1024), body
+
+
+def main():
+    sizes = [int(size) for size in (sys.argv[1] if len(sys.argv) > 1 else "1000,10000,100000").split(",")]
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    field = create_response_field(name="Response_list", type_=List[UserResponse], mode="serialization")
+    paths = {
+        "default": fastapi_path(field, JSONResponse),
+        "orjson": fastapi_path(field, ORJSONResponse),
+        "adapter": adapter_path,
+    }
+
+    print("📊 Admin user list serialization (best of %d runs)" % repeat)
+    for size in sizes:
+        users = make_users(size)
+        print(f"\n   {size} users")
+        baseline = None
+        for name, render in paths.items():
+            elapsed_ms, peak_mb, body = measure(render, users, repeat)
+            # Every path must produce the same document
+            document = json.loads(body)
+            if baseline is None:
+                baseline = document
+            assert document == baseline, f"{name} output differs from default"
+            print(f"   {name:<8} {elapsed_ms:>9.1f} ms   peak {peak_mb:>8.1f} MiB   {len(body) / 1024:>8.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
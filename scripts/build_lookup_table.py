@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Build the prediction lookup table for the current model file
+
+Evaluates the model configured by MODEL_CACHE_DIR / MODEL_FILE /
+PREDICTOR_ENGINE once on every (gender, month 0-60, height 40-130 cm per
+0.1 cm) cell and writes ``<model>.<hash>.lut.npy`` (+ ``.json``) next to the
+model file. Workers memory-map it at startup when it matches the model file's
+hash; rebuild after replacing the model.
+
+Usage:
+    python scripts/build_lookup_table.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.lookup_table import LookupTable, build_lookup_table, grid_keys
+from app.predictor import StuntingPredictor
+
+
+def main():
+    predictor = StuntingPredictor()
+    if not predictor.load():
+        print(f"❌ Model could not be loaded from {predictor.path}: {predictor.load_error}")
+        sys.exit(1)
+
+    print(f"🤖 Model {predictor.model_hash[:12]} ({predictor.engine}) loaded in {predictor.load_ms:.0f} ms")
+    started = time.perf_counter()
+    path = build_lookup_table(predictor)
+    print(f"📦 Wrote {path} ({os.path.getsize(path) / 1024:.0f} KiB) in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    # The table must give the live model's answer on every cell
+    table = LookupTable.open(predictor.path, predictor.model_hash)
+    keys = grid_keys()
+    if table is None or table.labels(keys) != predictor.predict_keys(keys):
+        print("❌ Lookup table does not match the model")
+        sys.exit(1)
+    print(f"✅ {len(keys)} grid cells match the model")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Export the sklearn model to a numpy-only kernel (.npz)
+
+Reads MODEL_CACHE_DIR/MODEL_FILE (needs scikit-learn), flattens the tree or
+forest into arrays and writes them next to it with the .npz extension
+(stunting_predictor.pkl -> stunting_predictor.npz), together with the model
+metadata and the .pkl's hash. Workers started with PREDICTOR_ENGINE=numpy
+load only the .npz and never import sklearn. The export is checked against
+the sklearn model on the whole input grid before this script exits.
+
+Usage:
+    python scripts/export_model_kernel.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.lookup_table import grid_keys
+from app.predictor import StuntingPredictor
+from app.tree_kernel import TreeEnsembleKernel, export_tree_model
+
+
+def main():
+    predictor = StuntingPredictor(engine="model")
+    if not predictor.load():
+        print(f"❌ Model could not be loaded from {predictor.path}: {predictor.load_error}")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    try:
+        export_tree_model(
+            predictor.model,
+            predictor.kernel_path,
+            metadata={**predictor.metadata, "model_hash": predictor.model_hash},
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"📦 Wrote {predictor.kernel_path} ({os.path.getsize(predictor.kernel_path) / 1024:.0f} KiB)"
+          f" in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    kernel = TreeEnsembleKernel.load(predictor.kernel_path)
+    rows = np.array([predictor.features(*key) for key in grid_keys()], dtype=np.float64)
+    if not np.array_equal(kernel.predict(rows), np.asarray(predictor.model.predict(rows)).astype(str)):
+        print("❌ Kernel predictions differ from the sklearn model")
+        sys.exit(1)
+    print(f"✅ {len(rows)} grid inputs predicted identically")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+-- Read replica initialization script for Stunting Checking App
+-- Runs once when the mysql-replica container starts with an empty data dir
+
+-- Follow the primary using GTID auto-positioning; databases, tables and
+-- the application user are created by replaying the primary's binary log
+CHANGE REPLICATION SOURCE TO
+    SOURCE_HOST = 'mysql',
+    SOURCE_PORT = 3306,
+    SOURCE_USER = 'root',
+    SOURCE_PASSWORD = 'rootpassword',
+    SOURCE_AUTO_POSITION = 1,
+    SOURCE_CONNECT_RETRY = 10,
+    GET_SOURCE_PUBLIC_KEY = 1;
+
+START REPLICA;
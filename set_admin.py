@@ -5,6 +5,7 @@ Script untuk set user menjadi admin
 
 import sys
 from sqlalchemy.orm import Session
+from app.crud import invalidate_user
 from app.database import SessionLocal
 from app.models import User
 
@@ -19,6 +20,10 @@ def set_user_admin(username: str, is_admin: bool = True):
         
         user.is_admin = is_admin
         db.commit()
+        # Recorded in claims_revocations: running API workers drop their
+        # cached principal and stop trusting old token claims within
+        # CLAIMS_REVOCATION_POLL_SECONDS
+        invalidate_user(db, user.id, [username], revokes_claims=True)
         db.refresh(user)
         
         print(f"✅ User '{username}' admin status set to: {is_admin}")
@@ -134,6 +134,43 @@ def test_admin_users_crud(admin_token):
     except requests.exceptions.RequestException as e:
         print(f"   ❌ Users CRUD test error: {e}")
 
+def test_admin_users_pagination(admin_token):
+    """Test following X-Next-Cursor through every users page, for each sort order"""
+    print(f"\n🔍 Testing admin users pagination...")
+    
+    headers = {"token": admin_token}
+    ok = True
+    for sort, order in (("id", "asc"), ("id", "desc"), ("registration_date", "asc"), ("registration_date", "desc")):
+        try:
+            seen, cursors, cursor = [], set(), None
+            while True:
+                params = {"limit": 2, "sort": sort, "order": order}
+                if cursor:
+                    params["cursor"] = cursor
+                response = requests.get(f"{BASE_URL}/users/", params=params, headers=headers)
+                if response.status_code != 200:
+                    print(f"   ❌ GET /users/ ({sort} {order}) - Failed: {response.status_code}")
+                    ok = False
+                    break
+                seen.extend(user['id'] for user in response.json())
+                cursor = response.headers.get("X-Next-Cursor")
+                if not cursor:
+                    break
+                if cursor in cursors:
+                    print(f"   ❌ GET /users/ ({sort} {order}) - cursor repeated after {len(seen)} users")
+                    ok = False
+                    break
+                cursors.add(cursor)
+            if ok and len(seen) == len(set(seen)):
+                print(f"   ✅ GET /users/ ({sort} {order}) - {len(seen)} users in {len(cursors) + 1} pages")
+            elif ok:
+                print(f"   ❌ GET /users/ ({sort} {order}) - duplicate users across pages")
+                ok = False
+        except requests.exceptions.RequestException as e:
+            print(f"   ❌ Users pagination test error: {e}")
+            ok = False
+    return ok
+
 def test_admin_children_crud(admin_token):
     """Test admin children CRUD operations"""
     print(f"\n🔍 Testing admin children CRUD operations...")
@@ -7,6 +7,7 @@ import requests
 import json
 import time
 from datetime import date, datetime
+from concurrent.futures import ThreadPoolExecutor
 
 # Base URL for production
 BASE_URL = "https://stunting-api.dedan.my.id/api"
@@ -161,6 +162,54 @@ def test_login_invalid_credentials():
         print(f"❌ Invalid credentials test error: {e}")
         return False
 
+def test_refresh_token(username, password):
+    """Test refresh token rotation and rejection of a reused refresh token"""
+    print("\n🔍 Testing refresh token rotation...")
+    
+    login_data = {
+        "username": username,
+        "password": password
+    }
+    
+    try:
+        response = requests.post(f"{BASE_URL}/auth/login", json=login_data)
+        if response.status_code != 200 or 'refresh_token' not in response.json():
+            print(f"❌ Login did not return a refresh token: {response.status_code}")
+            print(f"   Response: {response.text}")
+            return False
+        old_refresh_token = response.json()['refresh_token']
+        
+        response = requests.post(f"{BASE_URL}/auth/refresh", json={"refresh_token": old_refresh_token})
+        if response.status_code != 200:
+            print(f"❌ Refresh failed: {response.status_code}")
+            print(f"   Response: {response.text}")
+            return False
+        token_data = response.json()
+        if token_data['refresh_token'] == old_refresh_token:
+            print("❌ Refresh token was not rotated")
+            return False
+        
+        profile = requests.get(f"{BASE_URL}/profile", headers={"token": token_data['access_token']})
+        if profile.status_code != 200:
+            print(f"❌ Refreshed access token rejected: {profile.status_code}")
+            return False
+        
+        # A refresh token is single-use: replaying the old one must fail
+        response = requests.post(f"{BASE_URL}/auth/refresh", json={"refresh_token": old_refresh_token})
+        if response.status_code != 401:
+            print(f"❌ Reused refresh token should fail, got {response.status_code}")
+            return False
+        
+        response = requests.post(f"{BASE_URL}/auth/refresh", json={"refresh_token": token_data['refresh_token']})
+        if response.status_code != 200:
+            print(f"❌ Rotated refresh token rejected: {response.status_code}")
+            return False
+        print("✅ Refresh token rotation OK (old token rejected on reuse)")
+        return True
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Refresh token error: {e}")
+        return False
+
 def test_create_children(token):
     """Test creating children"""
     print("\n🔍 Testing children creation...")
@@ -313,6 +362,45 @@ def test_create_diagnose(token, children_id):
         print(f"❌ Diagnose creation error: {e}")
         return None
 
+def test_concurrent_diagnose(token, children_id):
+    """Test that concurrent diagnoses (micro-batched by the predictor) each get their own result"""
+    print("\n🔍 Testing concurrent diagnose creation...")
+    
+    headers = {"token": token}
+    measurements = [
+        {"age_on_month": age, "gender": gender, "height": height}
+        for age, gender, height in [(6, "L", 60), (12, "P", 74), (24, "L", 70), (24, "P", 88),
+                                    (36, "L", 95), (48, "P", 90), (60, "L", 112), (60, "P", 95)]
+    ]
+    
+    def diagnose(diagnose_data):
+        return requests.post(f"{BASE_URL}/children/{children_id}/diagnose", json=diagnose_data, headers=headers)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=len(measurements)) as executor:
+            responses = list(executor.map(diagnose, measurements))
+        failed = [response.status_code for response in responses if response.status_code != 201]
+        if failed:
+            print(f"❌ Concurrent diagnose failed: {failed}")
+            return False
+        
+        # A request that shared a batch must get the same label as the same measurement on its own
+        for diagnose_data, response in zip(measurements, responses):
+            result = response.json()
+            expected = diagnose(diagnose_data).json()['result']
+            if (result['age_on_month'], result['height']) != (diagnose_data['age_on_month'], diagnose_data['height']):
+                print(f"❌ Concurrent diagnose returned another request's row: sent {diagnose_data}, got {result}")
+                return False
+            if result['result'] != expected:
+                print(f"❌ Concurrent diagnose for {diagnose_data} got {result['result']}, alone it gets {expected}")
+                return False
+        
+        print(f"✅ Concurrent diagnose OK ({len(measurements)} requests, results match sequential predictions)")
+        return True
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Concurrent diagnose error: {e}")
+        return False
+
 def test_create_diagnose_invalid_age(token, children_id):
     """Test creating diagnose with invalid age"""
     print("\n🔍 Testing diagnose creation with invalid age...")
@@ -337,6 +425,57 @@ def test_create_diagnose_invalid_age(token, children_id):
         print(f"❌ Invalid age test error: {e}")
         return False
 
+def test_diagnose_batch(token, children_id):
+    """Test batch diagnose with valid, invalid and unknown-children items"""
+    print("\n🔍 Testing batch diagnose...")
+    
+    headers = {"token": token}
+    items = [
+        {"children_id": children_id, "age_on_month": 24, "gender": "L", "height": 85},
+        {"children_id": children_id, "age_on_month": 90, "gender": "P", "height": 80},
+        {"children_id": 999999999, "age_on_month": 12, "gender": "P", "height": 70},
+        {"children_id": children_id, "age_on_month": 36, "gender": "P", "height": 92},
+    ]
+    
+    try:
+        response = requests.post(f"{BASE_URL}/children/diagnose/batch", json=items, headers=headers)
+        if response.status_code != 200:
+            print(f"❌ Batch diagnose failed: {response.status_code}")
+            print(f"   Response: {response.text}")
+            return False
+        batch = response.json()
+        if (batch['created'], batch['failed']) != (2, 2):
+            print(f"❌ Batch diagnose expected 2 created / 2 failed, got {batch['created']} / {batch['failed']}")
+            return False
+        
+        results = batch['results']
+        if [result['index'] for result in results] != list(range(len(items))):
+            print(f"❌ Batch results are not in request order: {[result['index'] for result in results]}")
+            return False
+        # Invalid and unknown-children items are reported per item without rolling back the others
+        for index in (0, 3):
+            diagnose = results[index]['diagnose']
+            if results[index]['error'] or not diagnose or diagnose['height'] != items[index]['height']:
+                print(f"❌ Valid batch item {index} was not stored: {results[index]}")
+                return False
+        for index in (1, 2):
+            if results[index]['diagnose'] is not None or not results[index]['error']:
+                print(f"❌ Failing batch item {index} should carry an error: {results[index]}")
+                return False
+        
+        stored = {diagnose['id'] for diagnose in requests.get(
+            f"{BASE_URL}/children/{children_id}/diagnose?limit=200", headers=headers
+        ).json()}
+        if not {results[0]['diagnose']['id'], results[3]['diagnose']['id']} <= stored:
+            print("❌ Batch diagnoses are missing from the diagnose history")
+            return False
+        print(f"✅ Batch diagnose OK (created {batch['created']}, failed {batch['failed']})")
+        print(f"   Errors: {[result['error'] for result in results if result['error']]}")
+        return True
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Batch diagnose error: {e}")
+        return False
+
 def test_get_diagnose_list(token, children_id):
     """Test getting diagnose list"""
     print("\n🔍 Testing get diagnose list...")
@@ -358,6 +497,47 @@ def test_get_diagnose_list(token, children_id):
         print(f"❌ Get diagnose list error: {e}")
         return None
 
+def test_diagnose_pagination(token, children_id):
+    """Test following X-Next-Cursor through every diagnose page to the end"""
+    print("\n🔍 Testing diagnose pagination...")
+    
+    headers = {"token": token}
+    diagnose_data = {"age_on_month": 24, "gender": "L", "height": 85}
+    
+    try:
+        # Several diagnoses in the same second share diagnosed_at; only the id breaks the tie
+        for _ in range(5):
+            requests.post(f"{BASE_URL}/children/{children_id}/diagnose", json=diagnose_data, headers=headers)
+        expected = len(requests.get(f"{BASE_URL}/children/{children_id}/diagnose?limit=200", headers=headers).json())
+        
+        seen, cursors, cursor = [], set(), None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = requests.get(f"{BASE_URL}/children/{children_id}/diagnose", params=params, headers=headers)
+            if response.status_code != 200:
+                print(f"❌ Diagnose pagination failed: {response.status_code}")
+                print(f"   Response: {response.text}")
+                return False
+            seen.extend(diagnose['id'] for diagnose in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+            if cursor in cursors or len(seen) > expected:
+                print(f"❌ Diagnose pagination does not end: cursor repeated after {len(seen)} rows")
+                return False
+            cursors.add(cursor)
+        
+        if len(seen) == expected and len(set(seen)) == expected:
+            print(f"✅ Diagnose pagination OK ({expected} diagnoses in {len(cursors) + 1} pages)")
+            return True
+        print(f"❌ Diagnose pagination returned {len(seen)} rows ({len(set(seen))} unique), expected {expected}")
+        return False
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Diagnose pagination error: {e}")
+        return False
+
 def test_get_diagnose_detail(token, children_id, diagnose_id):
     """Test getting diagnose detail"""
     print("\n🔍 Testing get diagnose detail...")
@@ -482,6 +662,48 @@ def test_profile_update(token):
         print(f"❌ Profile update error: {e}")
         return None
 
+def test_profile_update_if_match(token):
+    """Test that a profile update with a stale If-Match is rejected with 412"""
+    print("\n🔍 Testing profile update with If-Match...")
+    
+    headers = {"token": token}
+    
+    try:
+        etag = requests.get(f"{BASE_URL}/profile", headers=headers).headers.get("ETag")
+        if not etag:
+            print("❌ Profile response has no ETag header")
+            return False
+        
+        response = requests.put(
+            f"{BASE_URL}/profile", json={"name": "If-Match User"}, headers={**headers, "If-Match": etag}
+        )
+        if response.status_code != 200 or response.headers.get("ETag") in (None, etag):
+            print(f"❌ Update with current If-Match failed: {response.status_code}")
+            print(f"   Response: {response.text}")
+            return False
+        current_etag = response.headers["ETag"]
+        
+        # The first update bumped the version, so the old ETag is now stale
+        response = requests.put(
+            f"{BASE_URL}/profile", json={"name": "Lost Update"}, headers={**headers, "If-Match": etag}
+        )
+        if response.status_code != 412:
+            print(f"❌ Stale If-Match should fail with 412, got {response.status_code}")
+            return False
+        if response.headers.get("ETag") != current_etag:
+            print(f"❌ 412 response should carry the current ETag {current_etag}, got {response.headers.get('ETag')}")
+            return False
+        
+        name = requests.get(f"{BASE_URL}/profile", headers=headers).json()['name']
+        if name != "If-Match User":
+            print(f"❌ Stale update was applied: name is {name}")
+            return False
+        print(f"✅ Profile If-Match OK (stale ETag rejected with 412, current ETag {current_etag})")
+        return True
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Profile If-Match error: {e}")
+        return False
+
 def test_change_password(token):
     """Test change password"""
     print("\n🔍 Testing change password...")
@@ -576,6 +798,7 @@ def main():
         return
     
     test_login_invalid_credentials()
+    test_refresh_token(user['username'], "testpass123")
     
     # Test children management
     children = test_create_children(token)
@@ -600,7 +823,10 @@ def main():
         print("   Skipping diagnose detail test...")
     else:
         test_create_diagnose_invalid_age(token, children['id'])
+        test_concurrent_diagnose(token, children['id'])
+        test_diagnose_batch(token, children['id'])
         test_get_diagnose_list(token, children['id'])
+        test_diagnose_pagination(token, children['id'])
         test_get_diagnose_detail(token, children['id'], diagnose['id'])
         test_generate_pdf_report(token, children['id'], diagnose['id'], "regular")
     
@@ -610,6 +836,7 @@ def main():
     # Test profile management
     test_get_profile(token)
     test_profile_update(token)
+    test_profile_update_if_match(token)
     test_change_password(token)
     
     # Test security
@@ -618,7 +845,7 @@ def main():
     
     print("\n🎉 All comprehensive tests completed!")
     print("✅ API is working correctly with all features")
-    print(f"📊 Tested endpoints: Health, Root, Auth, Children, Diagnose, Predictor, Profile, PDF Report")
+    print(f"📊 Tested endpoints: Health, Root, Auth, Refresh, Children, Diagnose, Diagnose Batch, Predictor, Profile, PDF Report")
     print(f"🔒 Security tests: Unauthorized access, Invalid tokens, Admin-only PDF")
     print(f"⚠️  Validation tests: Invalid data, Duplicate data")
 
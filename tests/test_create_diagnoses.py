@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test script untuk bulk insert diagnose (app/crud.py create_diagnoses)
+
+1. Jalur INSERT ... RETURNING (SQLite, PostgreSQL) mengembalikan baris sesuai urutan input
+2. Jalur tanpa RETURNING (MySQL) dijalankan di SQLite: batch dibaca ulang lewat
+   batch_token, jadi baris batch lain dengan stempel waktu dan anak yang sama
+   (terlihat di READ COMMITTED) tidak ikut terbaca
+3. create_diagnoses memakai jalur MySQL jika dialect tidak mendukung RETURNING
+
+Tidak butuh server. Usage:
+    python tests/test_create_diagnoses.py
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date
+
+DATABASE_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DATABASE_DIR, 'diagnoses.db')}"
+os.environ.setdefault("ENVIRONMENT", "test")
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, insert
+
+from app.crud import create_diagnoses, insert_diagnoses_read_back
+from app.database import Base, SessionLocal, engine
+from app.models import Children, DiagnoseHistory, User
+
+
+def setup_children() -> int:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(name="Tester", username="tester", dob=date(1990, 1, 1), gender="P", password="x")
+        db.add(user)
+        db.flush()
+        children = Children(user_id=user.id, name="Budi", gender="L", dob=date(2023, 1, 1))
+        db.add(children)
+        db.commit()
+        return children.id
+    finally:
+        db.close()
+
+
+def batch(children_id: int, heights) -> list:
+    return [
+        {"children_id": children_id, "age_on_month": 24, "gender": "L", "height": height, "result": "normal"}
+        for height in heights
+    ]
+
+
+def same_rows(stored, rows) -> bool:
+    return [(row.children_id, row.height) for row in stored] == [(row["children_id"], row["height"]) for row in rows]
+
+
+def test_returning_path(children_id: int) -> bool:
+    print("🔍 Testing INSERT ... RETURNING path...")
+    rows = batch(children_id, [80.0, 81.5, 79.2])
+    db = SessionLocal()
+    try:
+        stored = create_diagnoses(db, rows)
+    finally:
+        db.close()
+    if same_rows(stored, rows):
+        print(f"✅ {len(stored)} rows returned in input order")
+        return True
+    print(f"❌ Unexpected rows: {stored}")
+    return False
+
+
+def test_read_back_path(children_id: int) -> bool:
+    print("\n🔍 Testing read-back path (no RETURNING) with a concurrent batch...")
+    rows = batch(children_id, [90.0, 91.0, 92.0, 93.0])
+    db = SessionLocal()
+    connection = db.connection()
+    fired = []
+
+    def insert_concurrent_row(conn, cursor, statement, parameters, context, executemany):
+        # Another batch for the same child with the same stamp becomes visible
+        # between our INSERT and the read-back, as under READ COMMITTED
+        if executemany and not fired and statement.startswith("INSERT INTO diagnose_histories"):
+            fired.append(True)
+            stamp = context.compiled_parameters[0]["diagnosed_at"]
+            conn.execute(insert(DiagnoseHistory).values(
+                **batch(children_id, [99.9])[0], diagnosed_at=stamp, batch_token="other-batch",
+            ))
+
+    event.listen(connection, "after_cursor_execute", insert_concurrent_row)
+    try:
+        stored = insert_diagnoses_read_back(db, rows)
+        event.remove(connection, "after_cursor_execute", insert_concurrent_row)
+        db.commit()
+        concurrent = db.query(DiagnoseHistory).filter(DiagnoseHistory.batch_token == "other-batch").count()
+    finally:
+        db.close()
+    if concurrent != 1:
+        print("❌ Concurrent row was not inserted; test did not exercise the race")
+        return False
+    if same_rows(stored, rows) and [row.id for row in stored] == sorted(row.id for row in stored):
+        print(f"✅ {len(stored)} rows read back in input order, concurrent row excluded")
+        return True
+    print(f"❌ Unexpected rows: {[(row.id, row.height) for row in stored]}")
+    return False
+
+
+def test_dispatch_without_returning(children_id: int) -> bool:
+    print("\n🔍 Testing create_diagnoses on a dialect without INSERT RETURNING...")
+    rows = batch(children_id, [70.0, 71.0])
+    dialect = engine.dialect
+    supported = dialect.insert_executemany_returning
+    dialect.insert_executemany_returning = False
+    db = SessionLocal()
+    try:
+        stored = create_diagnoses(db, rows)
+        tokens = {
+            token for (token,) in db.query(DiagnoseHistory.batch_token)
+            .filter(DiagnoseHistory.id.in_([row.id for row in stored]))
+        }
+    finally:
+        db.close()
+        dialect.insert_executemany_returning = supported
+    if same_rows(stored, rows) and len(tokens) == 1 and None not in tokens:
+        print(f"✅ {len(stored)} rows stored with one batch token")
+        return True
+    print(f"❌ Unexpected rows: {stored}, tokens {tokens}")
+    return False
+
+
+def main():
+    print("🧪 Testing Bulk Diagnose Insert")
+    print("=" * 50)
+    children_id = setup_children()
+    results = [
+        test_returning_path(children_id),
+        test_read_back_path(children_id),
+        test_dispatch_without_returning(children_id),
+    ]
+    print("\n" + "=" * 50)
+    if all(results):
+        print("🎉 All bulk diagnose insert tests passed")
+    else:
+        print("❌ Some bulk diagnose insert tests failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test script untuk WHO height-for-age engine (app/haz.py)
+
+1. Cek engine terhadap nilai tabel z-score WHO (-3 SD / -2 SD / +3 SD)
+2. Bandingkan dengan model sklearn (MODEL_CACHE_DIR/MODEL_FILE) di seluruh grid
+   input: 2 gender x 61 bulan x tinggi 40-130 cm per 0.1 cm, lalu laporkan di
+   mana keduanya berbeda
+
+Tidak butuh server. Usage:
+    python tests/test_haz_parity.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.haz import CATEGORIES, SEX_INDEX, HeightForAgeClassifier, classify_z, height_for_age_z
+from app.predictor import DEFAULT_GENDER_MAPPING, StuntingPredictor
+
+# (gender, month, height cm, z) from the WHO length/height-for-age z-score tables
+WHO_REFERENCE_POINTS = [
+    ("L", 0, 44.2, -3), ("L", 0, 46.1, -2), ("L", 12, 71.0, -2), ("L", 24, 81.0, -2),
+    ("L", 24, 96.3, 3), ("L", 60, 96.1, -3), ("L", 60, 100.7, -2), ("L", 60, 123.9, 3),
+    ("P", 0, 43.6, -3), ("P", 0, 45.4, -2), ("P", 12, 68.9, -2), ("P", 24, 79.3, -2),
+    ("P", 24, 95.4, 3), ("P", 60, 95.2, -3), ("P", 60, 99.9, -2), ("P", 60, 123.7, 3),
+]
+
+HEIGHTS = np.round(np.arange(400, 1301) / 10, 1)
+MONTHS = np.arange(61)
+
+
+def test_who_reference_points():
+    """Test HAZ against the published WHO z-score tables (rounded to 0.1 cm)"""
+    print("🔍 Testing HAZ against WHO z-score tables...")
+    failed = 0
+    for gender, month, height, expected in WHO_REFERENCE_POINTS:
+        z = float(height_for_age_z(month, SEX_INDEX[gender], height))
+        if abs(z - expected) > 0.05:
+            failed += 1
+            print(f"❌ {gender} {month} bulan {height} cm: z={z:.3f}, expected {expected}")
+    if failed == 0:
+        print(f"✅ {len(WHO_REFERENCE_POINTS)} reference points OK")
+    return failed == 0
+
+
+def test_category_cutoffs():
+    """Test category boundaries: -3 and -2 belong to the upper class, +3 is still Normal"""
+    print("\n🔍 Testing category cut-offs...")
+    z = [-3.01, -3.0, -2.5, -2.0, 0.0, 3.0, 3.01]
+    expected = ["Severely Stunted", "Stunted", "Stunted", "Normal", "Normal", "Normal", "Tinggi"]
+    labels = list(CATEGORIES[classify_z(z)])
+    if labels == expected:
+        print("✅ Cut-offs OK")
+        return True
+    print(f"❌ Cut-offs: {labels}")
+    return False
+
+
+def grid_rows():
+    """Every (age_on_month, gender, height) row of the quantized input space"""
+    rows = []
+    for gender in ("L", "P"):
+        for month in MONTHS:
+            for height in HEIGHTS:
+                rows.append((int(month), gender, float(height)))
+    return rows
+
+
+def disagreement_ranges(rows, model_labels, who_labels):
+    """Height ranges per (gender, month) where the model and WHO differ"""
+    ranges = {}
+    for (month, gender, height), model_label, who_label in zip(rows, model_labels, who_labels):
+        if model_label == who_label:
+            continue
+        key = (gender, month, model_label, who_label)
+        low, high = ranges.get(key, (height, height))
+        ranges[key] = (min(low, height), max(high, height))
+    return ranges
+
+
+def test_model_parity():
+    """Compare the WHO engine with the pickled sklearn model on the whole grid"""
+    print("\n🔍 Comparing WHO engine with the sklearn model...")
+    predictor = StuntingPredictor(engine="model")
+    if not os.path.exists(predictor.path):
+        print(f"⚠️  Model not available ({predictor.path}); skipped")
+        return True
+    if not predictor.load():
+        print(f"❌ Model could not be loaded from {predictor.path}: {predictor.load_error}")
+        return False
+
+    rows = grid_rows()
+    features = np.array([predictor.features(*row) for row in rows], dtype=np.float64)
+    who = HeightForAgeClassifier(predictor.metadata.get("gender_mapping", DEFAULT_GENDER_MAPPING))
+
+    started = time.perf_counter()
+    model_labels = np.asarray(predictor.model.predict(features)).astype(str)
+    model_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    who_labels = who.predict(features)
+    who_ms = (time.perf_counter() - started) * 1000
+
+    single = features[:1]
+    started = time.perf_counter()
+    for _ in range(1000):
+        who.predict(single)
+    who_single_us = (time.perf_counter() - started) * 1000
+
+    agree = model_labels == who_labels
+    print(f"   Grid: {len(rows)} inputs, model {model_ms:.1f} ms, WHO engine {who_ms:.1f} ms,"
+          f" WHO single row {who_single_us:.1f} µs")
+    print(f"   Agreement: {agree.mean() * 100:.2f}% ({(~agree).sum()} different)")
+
+    print("\n   Model (rows) vs WHO (columns):")
+    print("   " + " " * 18 + "".join(f"{label:>18}" for label in CATEGORIES))
+    for model_label in CATEGORIES:
+        counts = [int(((model_labels == model_label) & (who_labels == who_label)).sum()) for who_label in CATEGORIES]
+        print(f"   {model_label:<18}" + "".join(f"{count:>18}" for count in counts))
+
+    ranges = disagreement_ranges(rows, model_labels, who_labels)
+    if ranges:
+        print("\n   Disagreements (gender, bulan: tinggi → model / WHO):")
+        for (gender, month, model_label, who_label), (low, high) in sorted(ranges.items()):
+            print(f"   {gender} {month:>2} bulan: {low:.1f}-{high:.1f} cm → {model_label} / {who_label}")
+    return True
+
+
+def main():
+    print("🧪 Testing WHO Height-for-Age Engine")
+    print("=" * 50)
+    results = [test_who_reference_points(), test_category_cutoffs(), test_model_parity()]
+    print("\n" + "=" * 50)
+    if all(results):
+        print("🎉 WHO engine tests completed")
+    else:
+        print("❌ Some WHO engine tests failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
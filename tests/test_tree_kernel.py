@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Test script untuk numpy tree kernel (app/tree_kernel.py)
+
+Membuktikan hasil kernel numpy identik bit-for-bit dengan sklearn:
+1. Model sintetis (DecisionTree, RandomForest, ExtraTrees) termasuk input
+   yang tepat sama dengan threshold split
+2. Model asli MODEL_CACHE_DIR/MODEL_FILE di seluruh grid input dan input acak
+3. Worker dengan PREDICTOR_ENGINE=numpy tidak meng-import sklearn
+
+Tidak butuh server. Usage:
+    python tests/test_tree_kernel.py
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from app.lookup_table import grid_keys
+from app.predictor import StuntingPredictor
+from app.tree_kernel import TreeEnsembleKernel, export_tree_model
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def bit_equal(a, b) -> bool:
+    """Same shape and the same bits (not just close values)"""
+    a, b = np.ascontiguousarray(a, dtype=np.float64), np.ascontiguousarray(b, dtype=np.float64)
+    return a.shape == b.shape and np.array_equal(a.view(np.uint64), b.view(np.uint64))
+
+
+def round_trip(model, directory):
+    path = os.path.join(directory, f"{type(model).__name__}.npz")
+    export_tree_model(model, path)
+    return TreeEnsembleKernel.load(path)
+
+
+def measurement_rows(count, seed):
+    """(age_on_month, gender, height) rows, also outside the valid ranges"""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.integers(-5, 70, count),
+        rng.integers(0, 2, count),
+        rng.uniform(20, 150, count),
+    ]).astype(np.float64)
+
+
+def threshold_rows(kernel):
+    """Rows sitting exactly on (and one float32 step around) every split threshold"""
+    rows = []
+    for feature, threshold in zip(kernel.feature, kernel.threshold):
+        value = np.float32(threshold)
+        for candidate in (value, np.nextafter(value, np.float32(-np.inf)), np.nextafter(value, np.float32(np.inf))):
+            row = np.zeros(kernel.n_features_in_)
+            row[feature] = candidate
+            rows.append(row)
+    return np.array(rows[:20000])
+
+
+def check(name, model, kernel, X) -> bool:
+    same_labels = np.array_equal(kernel.predict(X), np.asarray(model.predict(X)).astype(str))
+    same_proba = bit_equal(kernel.predict_proba(X), model.predict_proba(X))
+    if same_labels and same_proba:
+        print(f"✅ {name}: {len(X)} rows, labels and probabilities bit-for-bit identical")
+        return True
+    print(f"❌ {name}: labels {'OK' if same_labels else 'DIFFER'}, probabilities {'OK' if same_proba else 'DIFFER'}")
+    return False
+
+
+def test_synthetic_models():
+    """Test exported synthetic models against sklearn"""
+    print("🔍 Testing synthetic tree models...")
+    X = measurement_rows(3000, seed=1)
+    y = np.where(X[:, 2] - X[:, 0] * 0.9 < 50, "Stunted", np.where(X[:, 2] > 110, "Tinggi", "Normal"))
+    models = [
+        DecisionTreeClassifier(max_depth=12, random_state=0),
+        RandomForestClassifier(n_estimators=25, max_depth=10, random_state=0),
+        ExtraTreesClassifier(n_estimators=15, random_state=0),
+        RandomForestClassifier(n_estimators=10, min_samples_leaf=3, class_weight="balanced", random_state=0),
+    ]
+    ok = True
+    with tempfile.TemporaryDirectory() as directory:
+        for model in models:
+            model.fit(X, y)
+            kernel = round_trip(model, directory)
+            name = type(model).__name__
+            ok &= check(name, model, kernel, measurement_rows(20000, seed=2))
+            ok &= check(f"{name} at thresholds", model, kernel, threshold_rows(kernel))
+    return ok
+
+
+def test_stunting_model():
+    """Test the exported production model on the whole input grid"""
+    print("\n🔍 Testing exported stunting_predictor model...")
+    predictor = StuntingPredictor(engine="model")
+    if not predictor.load():
+        print(f"⚠️  Model not available ({predictor.load_error}); skipped")
+        return True
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            kernel = round_trip(predictor.model, directory)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return False
+        grid = np.array([predictor.features(*key) for key in grid_keys()], dtype=np.float64)
+        return (check("stunting_predictor grid", predictor.model, kernel, grid)
+                & check("stunting_predictor random", predictor.model, kernel, measurement_rows(50000, seed=3)))
+
+
+def test_worker_without_sklearn():
+    """Test that PREDICTOR_ENGINE=numpy predicts without importing sklearn"""
+    print("\n🔍 Testing numpy engine imports...")
+    X = measurement_rows(2000, seed=4)
+    y = np.where(X[:, 2] < 80, "Stunted", "Normal")
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    with tempfile.TemporaryDirectory() as directory:
+        export_tree_model(model, os.path.join(directory, "stunting_predictor.npz"), {"model_hash": "0" * 64})
+        code = (
+            "import sys\n"
+            "from app.predictor import stunting_predictor\n"
+            "assert stunting_predictor.load(), stunting_predictor.load_error\n"
+            "print(stunting_predictor.predict(24, 'L', 85.0))\n"
+            "print('sklearn' in sys.modules, 'pandas' in sys.modules)\n"
+        )
+        env = dict(os.environ, MODEL_CACHE_DIR=directory, PREDICTOR_ENGINE="numpy")
+        result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_DIR, env=env,
+                                capture_output=True, text=True)
+    lines = result.stdout.strip().splitlines()
+    if result.returncode == 0 and lines[-1] == "False False":
+        print(f"✅ Predicted {lines[-2]!r} without importing sklearn or pandas")
+        return True
+    print(f"❌ numpy engine: {result.stdout}{result.stderr}")
+    return False
+
+
+def main():
+    print("🧪 Testing Numpy Tree Kernel")
+    print("=" * 50)
+    results = [test_synthetic_models(), test_stunting_model(), test_worker_without_sklearn()]
+    print("\n" + "=" * 50)
+    if all(results):
+        print("🎉 Numpy kernel matches sklearn bit-for-bit")
+    else:
+        print("❌ Some numpy kernel tests failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()